@@ -0,0 +1,506 @@
+# ============================================================================================
+# BENCHMARKS DEL SISTEMA DE ACTUALIZACIÓN
+#
+# Uso:
+#   python .github/scripts/benchmark.py [--escalas 1,10,100,1000] [--salida informe.json]
+#                                       [--comparar informe_anterior.json] [--solo-nombres]
+#                                       [--solo-importacion] [--solo-sondeo] [--solo-agenda]
+#
+# Mide offline (sin red) el coste de las piezas del paquete ezdakit:
+#   - Tiempo de importación de cada orden de la CLI frente a su presupuesto (IMPORT_PROBES).
+#   - Normalización de nombres frente a la implementación de referencia.
+#   - Sondeo de acestreams (run_probe) contra el motor de prueba de standin.py.
+#   - Extractor de agenda frente a BeautifulSoup con distintos tamaños de bloque.
+#   - Cada etapa del pipeline sobre listas M3U y agendas sintéticas a 1x, 10x, 100x y 1000x
+#     del tamaño actual, generadas a partir del histórico (history/), *.m3u y canales/.
+# Produce un informe JSON comparable entre ejecuciones (tiempo y pico de memoria por etapa).
+# ============================================================================================
+
+import re
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+import contextlib
+import subprocess
+import io
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+SCRIPTS = Path(__file__).resolve().parent
+PACKAGE = SCRIPTS / "ezdakit"
+
+sys.path.insert(0, str(SCRIPTS))
+from ezdakit import config, util, inputs, channels, agenda, history
+
+# [v2.0] Presupuesto de importación por orden (ms, -X importtime acumulado): módulos que carga
+# cada orden y cuáles de NETWORK_MODULES puede cargar. render no debe pagar ninguno.
+IMPORT_PROBES = {
+    'render': (("ezdakit.cli", "ezdakit.pipeline"), 150, ()),
+    'serve': (("ezdakit.cli", "ezdakit.server"), 150, ('http.server',)),
+    'channels': (("ezdakit.cli", "ezdakit.pipeline", "ezdakit.fetch"), 250, ('requests', 'cloudscraper')),
+    'probe': (("ezdakit.cli", "ezdakit.pipeline", "ezdakit.liveness"), 300, ('requests',)),
+}
+NETWORK_MODULES = ('requests', 'cloudscraper', 'bs4', 'http.server', 'sqlite3')
+
+def package_sha():
+    """Huella del código del paquete (todos los .py en orden)."""
+    digest = hashlib.sha256()
+    for path in sorted(PACKAGE.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+# ============================================================================================
+# IMPLEMENTACIÓN DE REFERENCIA (v1.13)
+# ============================================================================================
+
+def legacy_clean_channel_name(name, ace_id_suffix):
+    if not name: return ""
+    name = re.sub(r'-->.*', '', name)
+    terms = [
+        r'1080p', r'720p', r'FHD', r'UHD', r'4K', r'8K',
+        r'HD', r'SD',
+        r'50fps', r'HEVC', r'AAC', r'H\.265',
+        r'\(ES\)', r'\(SP\)', r'\(RU\)', r'\(M\d+\)', r'\(O\d+\)',
+        r'\(BACKUP\)', r'\|', r'vip', r'premium', r'\( original \)',
+        r'\bBAR\b'
+    ]
+    for term in terms:
+        name = re.sub(term, '', name, flags=re.IGNORECASE)
+    name = name.replace('  ', ' ').strip().rstrip(' -_')
+    if ace_id_suffix and name.endswith(ace_id_suffix):
+        name = name[:-4].strip()
+    name = re.sub(r'\s+[0-9a-fA-F]{4}$', '', name)
+    return name.upper()
+
+def legacy_determine_quality(name):
+    u = name.upper()
+    if "4K" in u or "UHD" in u: return " (UHD)"
+    if "1080" in u or "FHD" in u: return " (FHD)"
+    return " (HD)"
+
+def legacy_agenda_records(html):
+    """AgendaDay / AgendaEvent con el recorrido BeautifulSoup de v1.15 (referencia de AgendaExtractor)."""
+    from bs4 import BeautifulSoup
+    for day in BeautifulSoup(html, 'html.parser').find_all('div', class_='events-day'):
+        yield agenda.AgendaDay(day.get('data-date'))
+        for row in day.find_all('tr', class_='event-row'):
+            comp = row.find('div', class_='competition-info')
+            yield agenda.AgendaEvent(day.get('data-date'), row.get('data-event-id'),
+                                     comp.get_text(separator=' ', strip=True) if comp else None,
+                                     tuple(td.get_text(strip=True) for td in row.find_all('td')),
+                                     tuple(ch.get_text().strip() for ch in row.find_all('span', class_='channel-link')))
+
+# ============================================================================================
+# BENCHMARKS
+# ============================================================================================
+
+def history_playlists(prefix=""):
+    """Todas las versiones archivadas en history/ de las listas cuyo nombre empieza por prefix."""
+    with _cwd(ROOT):
+        index = history.load_history_index()
+        for name, entry in sorted(index['lists'].items()):
+            if not name.startswith(prefix): continue
+            memo = {}
+            for sha in dict.fromkeys(sha for _, sha in entry['runs']):
+                header, blocks = history._history_blocks(entry, sha, memo)
+                yield header + "".join(blocks)
+
+@contextlib.contextmanager
+def _cwd(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def repo_m3u_entries(prefix=""):
+    """Diccionarios de entradas de las listas M3U de la raíz y de todas las versiones del histórico."""
+    for path in sorted(ROOT.glob(f"{prefix}*.m3u")):
+        yield channels.parse_m3u(str(path), "B")
+    for text in history_playlists(prefix):
+        yield channels.parse_m3u_lines(text.splitlines(True), "B")
+
+def collect_channel_names():
+    """Pares (nombre_crudo, sufijo_ace) de todas las listas M3U del repositorio."""
+    pairs = []
+    for entries in repo_m3u_entries():
+        for entry in entries.values():
+            pairs.append((entry.name, entry.ace_id[-4:]))
+    return pairs
+
+def _time_per_item(fn, items, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            fn(*item)
+    return (time.perf_counter() - start) / (rounds * len(items)) * 1e6
+
+def bench_clean_names(rounds=20):
+    print("[BENCH] clean_channel_name + determine_quality")
+    pairs = collect_channel_names()
+    if not pairs:
+        print("    [AVISO] No hay listas M3U en el repositorio.")
+        return
+
+    mismatches = [(n, s) for n, s in pairs
+                  if legacy_clean_channel_name(n, s) != util.clean_channel_name(n, s)
+                  or legacy_determine_quality(n) != util.determine_quality(n)]
+    print(f"    -> {len(pairs)} nombres ({len(set(pairs))} únicos), {len(mismatches)} diferencias con v1.13.")
+    for n, s in mismatches[:10]:
+        print(f"       {n!r}: {legacy_clean_channel_name(n, s)!r} != {util.clean_channel_name(n, s)!r}")
+
+    def legacy(n, s):
+        legacy_clean_channel_name(n, s)
+        legacy_determine_quality(n)
+
+    def current(n, s):
+        util.clean_channel_name(n, s)
+        util.determine_quality(n)
+
+    def current_cold(n, s):
+        util.scan_channel_name.cache_clear()
+        current(n, s)
+
+    t_legacy = _time_per_item(legacy, pairs, rounds)
+    t_cold = _time_per_item(current_cold, pairs, rounds)
+    util.scan_channel_name.cache_clear()
+    t_warm = _time_per_item(current, pairs, rounds)
+    print(f"    -> v1.13 (re.sub por término): {t_legacy:8.2f} µs/nombre")
+    print(f"    -> v1.14 sin memo:             {t_cold:8.2f} µs/nombre ({t_legacy / t_cold:.1f}x)")
+    print(f"    -> v1.14 con memo:             {t_warm:8.2f} µs/nombre ({t_legacy / t_warm:.1f}x)")
+
+# ============================================================================================
+# FIXTURES SINTÉTICAS
+# ============================================================================================
+
+def _fake_ace_id(ace_id, copy):
+    if copy == 0: return ace_id
+    return hashlib.sha1(f"{ace_id}:{copy}".encode()).hexdigest()
+
+def seed_m3u_entries(prefix):
+    """Entradas únicas por ace_id de las listas reales con ese prefijo (raíz + history/)."""
+    seed = {}
+    for entries in repo_m3u_entries(prefix):
+        seed.update(entries)
+    return list(seed.values())
+
+def synth_m3u(seed, scale):
+    """
+    Lista M3U con scale copias de la semilla. La copia 0 es la original; el resto lleva
+    ace_id y tvg-id propios, así el cruce con la agenda no crece de forma cuadrática.
+    """
+    lines = ["#EXTM3U"]
+    for copy in range(scale):
+        for e in seed:
+            aid = _fake_ace_id(e.ace_id, copy)
+            name = e.name.replace(e.ace_id[-4:], aid[-4:])
+            tvg = e.tvg if copy == 0 else f"{e.tvg} #{copy}"
+            lines.append(f'#EXTINF:-1 tvg-id="{tvg}" group-title="{e.group}",{name}')
+            lines.append(f"acestream://{aid}")
+    return "\n".join(lines) + "\n"
+
+def seed_agenda_events():
+    """Eventos (fecha, hora, evento, competición) -> textos de canal, desde eventos_canales.csv y descartes.csv."""
+    events = {}
+    path = ROOT / "canales" / "eventos_canales.csv"
+    if path.exists():
+        for row in csv.DictReader(io.StringIO(path.read_text(encoding='utf-8-sig'))):
+            key = (row['fecha'], row['hora'], row['evento'], row.get('competición', ''))
+            events.setdefault(key, set()).add(row.get('canal_agenda_real') or row.get('nombre_canal', ''))
+    path = ROOT / "canales" / "descartes.csv"
+    if path.exists():
+        fecha = min((k[0] for k in events), default=datetime.date.today().isoformat())
+        for row in csv.DictReader(io.StringIO(path.read_text(encoding='utf-8-sig'))):
+            evento = row['evento_descartado'] or ""
+            hora = evento[:5] if re.match(r'\d{2}:\d{2}', evento) else "00:00"
+            events.setdefault((fecha, hora, evento, ""), set()).add(row['nombre_canal_descartado'])
+    return sorted((k, sorted(v)) for k, v in events.items())
+
+def synth_agenda(seed, scale):
+    """Agenda HTML con scale copias de la semilla; cada copia desplaza las fechas una semana."""
+    by_day = {}
+    for copy in range(scale):
+        for (fecha, hora, evento, comp), names in seed:
+            try:
+                day = datetime.date.fromisoformat(fecha) + datetime.timedelta(days=7 * copy)
+            except ValueError:
+                continue
+            by_day.setdefault(day.isoformat(), []).append((hora, evento, comp, names))
+
+    out = ['<html><body><div class="agenda">']
+    for day in sorted(by_day):
+        out.append(f'<div class="events-day" data-date="{day}"><table>')
+        for hora, evento, comp, names in by_day[day]:
+            spans = "".join(f'<span class="channel-link">{c}</span>' for c in names)
+            out.append(f'<tr class="event-row" data-event-id="{evento}"><td>{hora}</td>'
+                       f'<td><div class="competition-info">{comp}</div></td><td>{evento}</td><td>{spans}</td></tr>')
+        out.append('</table></div>')
+    out.append('</div></body></html>')
+    return "\n".join(out)
+
+# ============================================================================================
+# ETAPAS DEL PIPELINE
+# ============================================================================================
+
+def measure(fn):
+    """Ejecuta fn midiendo tiempo de pared y pico de memoria (tracemalloc). Silencia los prints."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_pipeline(scales):
+    """Mide cada etapa a cada escala en un directorio temporal con copia de canales/."""
+    print("[BENCH] Etapas del pipeline")
+    seed_e = seed_m3u_entries("elcano")
+    seed_n = seed_m3u_entries("new_era")
+    seed_ag = seed_agenda_events()
+    results = []
+
+    cwd = os.getcwd()
+    for scale in scales:
+        workdir = tempfile.mkdtemp(prefix="bench_")
+        try:
+            shutil.copytree(ROOT / "canales", Path(workdir) / "canales")
+            os.chdir(workdir)
+            Path(config.FILE_ELCANO).write_text(synth_m3u(seed_e, scale), encoding='utf-8')
+            Path(config.FILE_NEW_ERA).write_text(synth_m3u(seed_n, scale), encoding='utf-8')
+            html = synth_agenda(seed_ag, scale)
+            channels._PARSED_M3U.clear()
+            util.scan_channel_name.cache_clear()
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                blacklist = inputs.load_blacklist()
+                dial_map, name_map = inputs.load_channel_maps()
+                rules = inputs.load_agenda_rules()
+
+            stages = []
+            parsed, t, peak = measure(lambda: (channels.parse_m3u(config.FILE_ELCANO, "E"), channels.parse_m3u(config.FILE_NEW_ERA, "N")))
+            stages.append(("parse_m3u", sum(len(p) for p in parsed), t, peak))
+            db, t, peak = measure(lambda: channels.build_master_channel_list(blacklist))
+            stages.append(("build_master_channel_list", len(db), t, peak))
+            (events, discarded), t, peak = measure(lambda: agenda.scrape_and_match(dial_map, name_map, db, html, rules))
+            n_rows = sum(len(m.streams) for m in events)
+            stages.append(("scrape_and_match", n_rows + len(discarded), t, peak))
+            _, t, peak = measure(lambda: channels.generate_correspondencias(db))
+            stages.append(("generate_correspondencias", len(db), t, peak))
+            _, t, peak = measure(lambda: channels.generate_ezdakit_m3u(db))
+            stages.append(("generate_ezdakit_m3u", len(db), t, peak))
+            _, t, peak = measure(lambda: agenda.generate_eventos_files(agenda.iter_event_rows(events)))
+            stages.append(("generate_eventos_files", n_rows, t, peak))
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        for stage, items, t, peak in stages:
+            results.append({'scale': scale, 'stage': stage, 'items': items,
+                            'seconds': round(t, 6), 'peak_kb': round(peak / 1024, 1)})
+            print(f"    {scale:>5}x {stage:<28} {items:>9} items {t * 1000:10.1f} ms {peak / 1048576:9.1f} MB")
+    return results
+
+def import_profile(modules):
+    """Importa modules en un intérprete nuevo con -X importtime: {módulo: ms acumulados}."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=SCRIPTS,
+                          capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit(): continue
+        cumulative[parts[2].strip()] = int(parts[1]) / 1000
+    return cumulative
+
+def bench_imports(rounds=5):
+    """Tiempo de importación de cada orden frente a su presupuesto (mejor de N intérpretes)."""
+    print("[BENCH] Importación por orden")
+    results, ok = [], True
+    for command, (modules, budget, allowed) in IMPORT_PROBES.items():
+        profiles = [import_profile(modules) for _ in range(rounds)]
+        best = min(profiles, key=lambda prof: sum(prof.get(m, 0) for m in modules))
+        total = sum(best.get(m, 0) for m in modules)
+        heavy = [m for m in NETWORK_MODULES if m in best]
+        unexpected = [m for m in heavy if m not in allowed]
+        status = "OK" if total <= budget and not unexpected else "EXCEDIDO"
+        print(f"    {command:<10} {total:8.1f} / {budget} ms  {status:<8} red: {', '.join(heavy) or '-'}")
+        if unexpected:
+            print(f"    [ALERTA] {command} importa módulos no previstos: {', '.join(unexpected)}")
+        ok = ok and status == "OK"
+        results.append({'command': command, 'import_ms': round(total, 1), 'budget_ms': budget,
+                        'network_modules': heavy})
+    return results, ok
+
+def check_probe(timeout=1.0):
+    """
+    [v2.1] Comprueba run_probe contra el motor de prueba (standin.py) sobre las listas reales:
+    umbral de fallos, TTL por estado, lista negra automática, su fusión y la salida al revivir.
+    """
+    from ezdakit import liveness, pipeline
+    from ezdakit.standin import start_standin_engine
+    print("[CHECK] Sondeo de acestreams contra el motor de prueba")
+    failures = []
+    def expect(cond, message):
+        if not cond: failures.append(message)
+
+    workdir = tempfile.mkdtemp(prefix="probe_")
+    engine = None
+    try:
+        shutil.copytree(ROOT / "canales", Path(workdir) / "canales")
+        for src in config.CHANNEL_SOURCES:
+            shutil.copy(ROOT / src.file, Path(workdir) / src.file)
+        with _cwd(workdir):
+            with contextlib.redirect_stdout(io.StringIO()):
+                ace_ids = [ch.ace_id for ch in channels.build_master_channel_list(inputs.load_blacklist())]
+            modes = {'no_peers': ace_ids[0:3], 'timeout': ace_ids[3:6], 'error': ace_ids[6:9]}
+            dead = {aid for ids in modes.values() for aid in ids}
+            engine = start_standin_engine({aid: mode for mode, ids in modes.items() for aid in ids},
+                                          warmup=0.0, hang=timeout + 2)
+
+            def probe():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    pipeline.run_probe(engine.url, timeout=timeout)
+                return set(inputs._read_blacklist(Path(config.FILE_AUTO_BLACKLIST))) \
+                    if Path(config.FILE_AUTO_BLACKLIST).exists() else set()
+
+            def age_results(seconds):
+                cache = liveness.load_liveness_cache()
+                for state in cache.values(): state['checked'] -= seconds
+                liveness.save_liveness_cache(cache)
+
+            start = time.perf_counter()
+            auto = probe()
+            elapsed = time.perf_counter() - start
+            expect(engine.requests['getstream'] == len(ace_ids), f"1ª pasada: {engine.requests['getstream']} de {len(ace_ids)} IDs sondeados")
+            expect(not auto, f"1 fallo ya bloquea {len(auto)} IDs (umbral {liveness.PROBE_DEAD_STRIKES})")
+            expect(engine.requests['stop'] == len(ace_ids) - len(modes['error']), "sesiones sin cerrar")
+
+            engine.requests.clear()
+            probe()
+            expect(engine.requests['getstream'] == 0, f"con resultados vigentes se sondean {engine.requests['getstream']} IDs")
+
+            # Pasado el TTL de los muertos (y no el de los vivos) solo se reintentan los muertos
+            age_results(liveness.PROBE_TTL_DEAD + 1)
+            engine.requests.clear()
+            auto = probe()
+            expect(engine.requests['getstream'] == len(dead), f"tras el TTL se sondean {engine.requests['getstream']} IDs, no {len(dead)}")
+            expect(auto == dead, f"lista negra automática con {len(auto)} IDs, no {len(dead)}")
+            with contextlib.redirect_stdout(io.StringIO()):
+                merged = inputs.load_blacklist()
+            expect(dead <= set(merged), "load_blacklist no fusiona la lista automática")
+            with open(config.FILE_CORRESPONDENCIAS, encoding='utf-8-sig', newline='') as f:
+                marked = {row['acestream_id'] for row in csv.DictReader(f) if row['lista_negra'] == 'yes'}
+            expect(dead <= marked, "las salidas regeneradas no marcan los IDs muertos")
+
+            # Un ID que vuelve a responder sale de la lista en el siguiente sondeo
+            revived = modes['no_peers'][0]
+            engine.streams[revived] = 'peers'
+            age_results(liveness.PROBE_TTL_DEAD + 1)
+            auto = probe()
+            expect(auto == dead - {revived}, "un ID revivido sigue en la lista negra automática")
+    finally:
+        if engine: engine.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for message in failures:
+        print(f"    [FALLO] {message}")
+    print(f"    -> {len(ace_ids)} IDs sondeados en {elapsed:.1f}s ({liveness.PROBE_CONCURRENCY} en paralelo, "
+          f"timeout {timeout:g}s); {'OK' if not failures else f'{len(failures)} fallos'}.")
+    return not failures
+
+# Textos de varias palabras, entidades y comentarios: lo que se rompe si un nodo de texto se
+# parte entre dos feed()
+AGENDA_EDGE_CASES = (
+    '<div class="events-day" data-date="2025-01-01"><table>'
+    '<tr class="event-row" data-event-id="e1"><td> 21:00 </td>'
+    '<td><div class="competition-info"> Liga  <b>Primera</b> Division </div></td>'
+    '<td>Real Madrid - Atl&eacute;tico de Madrid</td>'
+    '<td><span class="channel-link"> M+ Liga de Campeones 2 </span><span class="channel-link">DAZN <!-- x -->LaLiga</span></td></tr>'
+    '</table></div>'
+)
+
+def check_agenda_extractor(chunk_sizes=(1, 5, 7, 64, 8192, 65536), scale=10):
+    """
+    [v1.16] Comprueba que AgendaExtractor produce lo mismo que BeautifulSoup con cualquier
+    tamaño de bloque (los nodos de texto que cruzan bloques no deben perder ni ganar espacios).
+    """
+    print("[CHECK] Extractor de agenda frente a BeautifulSoup")
+    failures = []
+    html = AGENDA_EDGE_CASES + "\n" + synth_agenda(seed_agenda_events(), scale)
+    expected = list(legacy_agenda_records(html))
+    for size in chunk_sizes:
+        got = list(agenda.iter_agenda_records(html, chunk_size=size))
+        if got != expected:
+            diff = next((i for i, (a, b) in enumerate(zip(got, expected)) if a != b), min(len(got), len(expected)))
+            failures.append(f"bloques de {size}: registro {diff} difiere "
+                            f"({got[diff] if diff < len(got) else '-'} != {expected[diff] if diff < len(expected) else '-'})")
+    for message in failures:
+        print(f"    [FALLO] {message}")
+    print(f"    -> {len(expected)} registros ({len(html) // 1024} KB) con bloques de "
+          f"{', '.join(map(str, chunk_sizes))}; {'OK' if not failures else f'{len(failures)} fallos'}.")
+    return not failures
+
+def compare_reports(previous_path, results):
+    """Imprime la variación de tiempo y memoria frente a un informe anterior."""
+    previous = json.loads(Path(previous_path).read_text(encoding='utf-8'))
+    before = {(r['scale'], r['stage']): r for r in previous.get('results', [])}
+    print(f"[BENCH] Comparación con {previous_path}")
+    for r in results:
+        old = before.get((r['scale'], r['stage']))
+        if not old: continue
+        dt = (r['seconds'] / old['seconds'] - 1) * 100 if old['seconds'] else 0.0
+        dm = (r['peak_kb'] / old['peak_kb'] - 1) * 100 if old['peak_kb'] else 0.0
+        print(f"    {r['scale']:>5}x {r['stage']:<28} tiempo {dt:+7.1f}%  memoria {dm:+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline del paquete ezdakit")
+    parser.add_argument("--escalas", default="1,10,100,1000", help="Factores de escala separados por comas")
+    parser.add_argument("--salida", default="bench_report.json", help="Fichero JSON de resultados")
+    parser.add_argument("--comparar", help="Informe JSON anterior con el que comparar")
+    parser.add_argument("--solo-nombres", action="store_true", help="Solo el benchmark de nombres")
+    parser.add_argument("--solo-importacion", action="store_true",
+                        help="Solo el presupuesto de importación (código de salida 1 si se excede)")
+    parser.add_argument("--solo-sondeo", action="store_true",
+                        help="Solo la comprobación del sondeo de acestreams (código de salida 1 si falla)")
+    parser.add_argument("--solo-agenda", action="store_true",
+                        help="Solo la comprobación del extractor de agenda (código de salida 1 si falla)")
+    args = parser.parse_args()
+
+    if args.solo_sondeo: sys.exit(0 if check_probe() else 1)
+    if args.solo_agenda: sys.exit(0 if check_agenda_extractor() else 1)
+    imports, imports_ok = bench_imports()
+    if args.solo_importacion: sys.exit(0 if imports_ok else 1)
+
+    bench_clean_names()
+    if args.solo_nombres: return
+    check_probe()
+    check_agenda_extractor()
+
+    scales = [int(x) for x in args.escalas.split(",") if x.strip()]
+    results = bench_pipeline(scales)
+    report = {
+        'generated': datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'),
+        'python': sys.version.split()[0],
+        'script_sha': package_sha(),
+        'imports': imports,
+        'results': results,
+    }
+    Path(args.salida).write_text(json.dumps(report, indent=2), encoding='utf-8')
+    print(f"[BENCH] Informe guardado en {args.salida}")
+    if args.comparar:
+        compare_reports(args.comparar, results)
+
+if __name__ == "__main__":
+    main()
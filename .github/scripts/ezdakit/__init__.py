@@ -0,0 +1,39 @@
+# ============================================================================================
+# SCRIPT DE ACTUALIZACIÓN DE CANALES Y AGENDA DEPORTIVA
+#
+# VERSIÓN: 2.1
+#
+# Paquete: config, util, metrics, scheduler, cache, replay, proxylog, health, inputs, channels,
+# agenda, fetch, liveness, store, history, server, pipeline y cli. Se ejecuta con update_system.py o
+# python -m ezdakit; ver cli.py para las órdenes.
+#
+# CHANGELOG:
+# - [v2.1] Orden probe: sondeo concurrente de acestreams contra el motor local (caché con TTL) y lista negra automática.
+# - [v2.0] Paquete ezdakit con importación perezosa y órdenes por etapa (all, channels, events, render, serve, daemon).
+# - [v1.30] Modo demonio (--demonio): sesiones HTTP persistentes por gateway, entradas en memoria y refresco de agenda y listas con cadencias propias.
+# - [v1.29] Modo servidor (--servir [PUERTO]): listas M3U filtradas por parámetros, con caché, ETag/304 y gzip.
+# - [v1.28] Log de proxies segmentado por día (solo anexar), retención borrando segmentos y resumen por gateway.
+# - [v1.27] Salidas (CSV y M3U) en streaming con sustitución atómica; si el contenido no cambia no se escribe nada.
+# - [v1.26] Registro de fuentes de listas (CHANNEL_SOURCES): todas se descargan a la vez y se fusionan por ace_id según prioridad.
+# - [v1.25] Planificador de etapas por dependencias: descargas de listas, agenda y cargas CSV en paralelo hasta el cruce.
+# - [v1.24] El cruce de agenda produce una fila por evento-canal con sus streams enlazados; la expansión por stream se hace al escribir.
+# - [v1.23] Registros compactos (namedtuple) para master_db, eventos y descartes; cadenas repetidas internadas y orden por campos.
+# - [v1.22] Almacén SQLite opcional (--sqlite): canales, eventos y descartes con upserts; los CSV/M3U se regeneran solo si cambian filas.
+# - [v1.21] Histórico deduplicado en history/: deltas por entrada comprimidos e índice de apariciones por ace_id.
+# - [v1.20] Modos --record DIR / --replay DIR: instantáneas direccionadas por contenido y servidor local que imita los gateways.
+# - [v1.19] Modo --profile: cProfile por etapa (.pstats y pilas colapsadas para flamegraph) y resumen de funciones calientes.
+# - [v1.18] Métricas por etapa (tiempo, CPU, memoria, contadores) en .debug/last_run.json y .debug/metrics.jsonl.
+# - [v1.17] Procesado incremental de la agenda: solo se re-cruzan los días cuyo HTML ha cambiado.
+# - [v1.16] Extractor de agenda en streaming (html.parser) en lugar de dos árboles BeautifulSoup.
+# - [v1.15] Reglas de normalización de canal_agenda cargadas desde canales/reglas_agenda.csv (motor de una pasada + contadores).
+# - [v1.14] Normalización de nombres compilada en una sola pasada (limpieza + calidad) con memo.
+# - [v1.13] Parser M3U en streaming (una pasada) alimentado directamente desde la respuesta HTTP.
+# - [v1.12] Caché de descargas (ETag/Last-Modified/SHA) y salto de etapas sin cambios en origen.
+# - [v1.11] Salud de gateways persistente (EWMA + circuit breaker) para ordenar/saltar mirrors.
+# - [v1.10] Sondeo paralelo de proxies de agenda con puntuación (frescura, completitud, latencia).
+# - [v1.9] Descarga concurrente de mirrors M3U: gana la primera respuesta válida (#EXTM3U).
+# - [v1.8] Nuevo campo 'canal_agenda_real' en CSV eventos (texto raw de la web sin procesar).
+# - [v1.7] CAMBIO DE LÓGICA: Vinculación por NOMBRE (canal_agenda -> listado_canales).
+# - [v1.6] Añadida regla exacta: "DAZN LA LIGA" >> "DAZN LA LIGA 1".
+# - [v1.5] Añadida regla de normalización final: "LALIGA" >> "M+ LALIGA".
+# ============================================================================================
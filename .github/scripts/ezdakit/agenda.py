@@ -0,0 +1,527 @@
+# ============================================================================================
+# SCRAPING Y EVENTOS
+# ============================================================================================
+# Extracción de la agenda, cruce con la lista maestra y ficheros de eventos (sin red: la
+# descarga de la agenda está en fetch.py).
+
+import sys
+import re
+import csv
+import datetime
+import json
+import operator
+from html.parser import HTMLParser
+from pathlib import Path
+from collections import namedtuple
+
+from . import config
+from .cache import sha256_text, stage_key
+from .metrics import count
+from .util import AtomicOutput
+
+# [v1.15] Extracción del dial en el texto de canal de la agenda
+RE_DIAL_M = re.compile(r'(\([^)]*?M(\d+)[^)]*?\))')
+RE_DIAL_PAREN = re.compile(r'(\((\d+)\))')
+
+# [v1.17] Inicio de cada bloque de día (para trocear la agenda por días)
+RE_DAY_START = re.compile(r'<div\b[^>]*\bclass=["\'][^"\']*\bevents-day\b', re.IGNORECASE)
+
+# [v1.10] Completitud de la agenda (nº de filas) sin construir el árbol HTML
+RE_EVENT_ROW = re.compile(r'<tr\b[^>]*\bclass=["\'][^"\']*\bevent-row\b', re.IGNORECASE)
+
+# [v1.16] Registros del extractor de agenda
+AgendaDay = namedtuple('AgendaDay', ['date'])
+AgendaEvent = namedtuple('AgendaEvent', ['date', 'event_id', 'competition', 'cells', 'channels'])
+
+# [v1.24] Cruce evento-canal: una fila por canal de agenda casado, con los streams
+# (registros Channel compartidos, no copias) como tabla de enlaces.
+AgendaMatch = namedtuple('AgendaMatch', ['fecha', 'hora', 'competicion', 'evento',
+                                         'dial_M', 'tvg_id', 'nombre_canal', 'canal_agenda',
+                                         'canal_agenda_real', 'dia_str_m3u', 'streams'])
+
+# [v1.23] Fila evento-stream (la de eventos_canales.csv) y descarte. Los cuatro primeros
+# campos de AgendaMatch y EventMatch son la clave de orden de la salida.
+EventMatch = namedtuple('EventMatch', ['fecha', 'hora', 'competicion', 'evento',
+                                       'acestream_id', 'dial_M', 'tvg_id', 'nombre_canal',
+                                       'canal_agenda', 'canal_agenda_real', 'calidad', 'lista_negra',
+                                       'calidad_tag', 'dia_str_m3u', 'ace_prefix'])
+EVENT_SORT_KEY = operator.itemgetter(0, 1, 2, 3)
+Discard = namedtuple('Discard', ['dial_M', 'nombre_canal_descartado', 'evento_descartado', 'motivo'])
+
+# Elementos HTML sin etiqueta de cierre (no se apilan)
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+             'meta', 'param', 'source', 'track', 'wbr'}
+
+class AgendaExtractor(HTMLParser):
+    """
+    [v1.16] Extractor por eventos de la agenda: no construye árbol. Emite un AgendaDay al
+    abrir cada div.events-day y un AgendaEvent al cerrar cada tr.event-row con:
+      - competition: texto de div.competition-info (get_text(' ', strip=True)) o None,
+      - cells: texto de cada <td> (get_text(strip=True)),
+      - channels: texto de cada span.channel-link (get_text().strip()).
+    Los registros se acumulan en self.records; el consumidor los va vaciando.
+    Un nodo de texto que cruza el límite entre dos feed() llega en varios handle_data: los
+    trozos se unen antes de aplicar strip, como haría BeautifulSoup con el nodo completo.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records = []
+        self._stack = []        # Etiquetas abiertas
+        self._day = None        # (profundidad, fecha)
+        self._row = None        # Evento en construcción
+        self._texts = []        # Acumuladores de texto abiertos: (profundidad, tipo, lista)
+        self._in_text = False   # El último evento fue texto: el siguiente handle_data lo continúa
+
+    @staticmethod
+    def _classes(attrs):
+        for name, value in attrs:
+            if name == 'class' and value:
+                return value.split()
+        return ()
+
+    def handle_starttag(self, tag, attrs):
+        self._in_text = False
+        if tag in VOID_TAGS:
+            return
+        self._stack.append(tag)
+        depth = len(self._stack)
+
+        if tag == 'div' and self._day is None and 'events-day' in self._classes(attrs):
+            date = dict(attrs).get('data-date')
+            self._day = (depth, date)
+            self.records.append(AgendaDay(date))
+        elif self._day is None:
+            return
+        elif tag == 'tr' and self._row is None and 'event-row' in self._classes(attrs):
+            self._row = {'depth': depth, 'event_id': dict(attrs).get('data-event-id'),
+                         'competition': None, 'cells': [], 'channels': []}
+        elif self._row is not None:
+            if tag == 'td':
+                self._texts.append((depth, 'td', []))
+            elif tag == 'div' and self._row['competition'] is None and 'competition-info' in self._classes(attrs):
+                self._texts.append((depth, 'comp', []))
+            elif tag == 'span' and 'channel-link' in self._classes(attrs):
+                self._texts.append((depth, 'channel', []))
+
+    def handle_endtag(self, tag):
+        self._in_text = False
+        if tag not in self._stack:
+            return
+        while self._stack:
+            closed = self._stack.pop()
+            self._close(len(self._stack) + 1)
+            if closed == tag:
+                break
+
+    def _close(self, depth):
+        while self._texts and self._texts[-1][0] == depth:
+            _, kind, parts = self._texts.pop()
+            if kind == 'td':
+                self._row['cells'].append("".join(p.strip() for p in parts))
+            elif kind == 'comp':
+                self._row['competition'] = " ".join(p.strip() for p in parts if p.strip())
+            else:
+                self._row['channels'].append("".join(parts).strip())
+
+        if self._row is not None and self._row['depth'] == depth:
+            row = self._row
+            self._row = None
+            self.records.append(AgendaEvent(self._day[1], row['event_id'], row['competition'],
+                                            tuple(row['cells']), tuple(row['channels'])))
+        if self._day is not None and self._day[0] == depth:
+            self._day = None
+
+    def handle_data(self, data):
+        for _, _, parts in self._texts:
+            if self._in_text and parts:
+                parts[-1] += data
+            else:
+                parts.append(data)
+        self._in_text = True
+
+    def handle_comment(self, data):
+        self._in_text = False   # Un comentario separa nodos de texto (y get_text no lo incluye)
+
+    def close(self):
+        super().close()
+        while self._stack:
+            self._stack.pop()
+            self._close(len(self._stack) + 1)
+
+def iter_agenda_records(html, chunk_size=65536):
+    """
+    [v1.16] Recorre la agenda en una pasada y va produciendo AgendaDay / AgendaEvent.
+    Se alimenta por bloques, así que el consumidor puede parar en cuanto tenga lo que necesita.
+    """
+    parser = AgendaExtractor()
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        if parser.records:
+            yield from parser.records
+            parser.records = []
+    parser.close()
+    yield from parser.records
+
+def first_agenda_day(html):
+    """[v1.16] Primer AgendaDay de la agenda (o None); no procesa el resto del HTML."""
+    for record in iter_agenda_records(html, chunk_size=8192):
+        if isinstance(record, AgendaDay):
+            return record
+    return None
+
+def _apply_agenda_rules(rules, text):
+    """Aplica el motor de reglas y devuelve (texto_normalizado, índices de reglas aplicadas)."""
+    fired = []
+    if rules['pattern'] is not None:
+        def rewrite(m):
+            idx = int(m.lastgroup[1:])
+            fired.append(idx)
+            return rules['rules'][idx]['reemplazo']
+        text = rules['pattern'].sub(rewrite, text)
+
+    text = text.strip()
+    idx = rules['exact'].get(text)
+    if idx is not None:
+        fired.append(idx)
+        text = rules['rules'][idx]['reemplazo']
+    return text, fired
+
+def normalize_agenda_channel(rules, txt):
+    """
+    [v1.6/v1.15] Extrae el dial del texto de la agenda y normaliza el nombre del canal.
+    Devuelve (dial, canal_agenda_clean). Resultado memoizado durante la ejecución.
+    """
+    rules['lookups'] += 1
+    cached = rules['memo'].get(txt)
+    if cached is None:
+        dial = None
+        canal_agenda_clean = txt # Valor inicial
+
+        m_match = RE_DIAL_M.search(txt)
+        d_match = RE_DIAL_PAREN.search(txt)
+
+        # 1. Extracción del Dial y Limpieza base
+        if m_match:
+            dial = m_match.group(2)
+            canal_agenda_clean = txt.replace(m_match.group(1), "")
+        elif d_match:
+            if "ORANGE" not in txt.upper():
+                dial = d_match.group(2)
+                canal_agenda_clean = txt.replace(d_match.group(1), "")
+
+        # 2. Normalización Estricta por reglas
+        canal_agenda_clean, fired = _apply_agenda_rules(rules, canal_agenda_clean.upper().strip())
+        cached = (dial, canal_agenda_clean, tuple(dict.fromkeys(fired)))
+        rules['memo'][txt] = cached
+
+    for idx in cached[2]:
+        rules['hits'][idx] += 1
+    return cached[0], cached[1]
+
+def report_agenda_rules(rules, log=print):
+    """
+    [v1.15] Contadores por regla (aciertos / canales evaluados) para detectar reglas muertas.
+    Incluyen los días reutilizados de agenda_days.json (scrape_and_match suma sus rule_hits).
+    """
+    if not rules['rules']: return
+    total = rules['lookups']
+    # [v1.17] Los días reutilizados de la caché aportan sus aciertos, pero no sus textos
+    log(f"    [REGLAS] {total} canales evaluados ({len(rules['memo'])} textos distintos normalizados en esta ejecución).")
+    for idx, rule in enumerate(rules['rules']):
+        hits = rules['hits'][idx]
+        dead = " [SIN USO]" if hits == 0 else ""
+        log(f"      #{idx + 1} {rule['tipo']:<7} {rule['patron']!r} -> {rule['reemplazo']!r}: "
+              f"{hits} aciertos / {total - hits} fallos{dead}")
+
+def match_agenda_records(records, tvg_index, name_map, rules):
+    """
+    Cruza los registros de agenda (AgendaDay / AgendaEvent) con los streams disponibles.
+    Devuelve (events_list, discarded_list, días encontrados); events_list son AgendaMatch.
+    """
+    events_list = []
+    discarded_list = [] 
+    dias_semana = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+    # [v1.16] Extractor en streaming: un AgendaDay por día y un AgendaEvent por fila
+    days_found = 0
+    day_ok = False
+    for record in records:
+        if isinstance(record, AgendaDay):
+            days_found += 1
+            day_ok = False
+            date_iso = record.date
+            if not date_iso: continue
+            try:
+                dt = datetime.datetime.strptime(date_iso, "%Y-%m-%d")
+                fecha_csv = sys.intern(date_iso)
+                dia_m3u = sys.intern(f"{dt.strftime('%m-%d')} ({dias_semana[dt.weekday()]})")
+                day_ok = True
+            except: pass
+            continue
+
+        if not day_ok: continue
+        event_raw = record.event_id
+        competition = record.competition or ""
+        
+        tds = record.cells
+        hora_evento = "00:00"
+        if len(tds) >= 3:
+            hora_evento = tds[0]
+            if not event_raw or event_raw.endswith("--"):
+                teams = tds[2]
+                event_raw = teams
+            if not competition:
+                competition = tds[1]
+        # [v1.23] Hora y competición se repiten en muchas filas: una sola copia
+        hora_evento = sys.intern(hora_evento)
+        competition = sys.intern(competition)
+        
+        channels = record.channels
+        processed_ace_ids = set()
+        
+        for txt in channels:
+            canal_agenda_real = txt # [v1.8] Guardamos valor crudo
+            
+            # [v1.15] Dial + normalización por reglas (memoizado por texto crudo)
+            dial, canal_agenda_clean = normalize_agenda_channel(rules, txt)
+
+            # [v1.7] NUEVA LÓGICA DE CRUCE
+            # Condición 1: Debe tener Dial válido (Filtro de Admisión)
+            if not dial:
+                 # Se ignora silenciosamente o se descarta
+                 discarded_list.append(Discard('?', txt, event_raw, 'no_dial_detected'))
+                 continue
+
+            # Condición 2: Buscar por NOMBRE en el mapa local
+            target_tvg = name_map.get(canal_agenda_clean)
+
+            if not target_tvg:
+                discarded_list.append(Discard(dial, txt, event_raw, f'mapping_not_found_for: {canal_agenda_clean}'))
+                continue
+            
+            # Si llegamos aquí, tenemos TVG-ID válido
+            nombre_canal_csv = canal_agenda_clean 
+
+            available_streams = tvg_index.get(target_tvg, [])
+            if not available_streams:
+                discarded_list.append(Discard(dial, txt, event_raw, 'no_streams'))
+                continue
+
+            # [v1.24] Solo se enlazan los streams; un mismo ace_id no se repite dentro de la fila
+            streams = []
+            for stream in available_streams:
+                aid = stream.ace_id
+                if aid in processed_ace_ids: continue
+                processed_ace_ids.add(aid)
+                streams.append(stream)
+            if not streams: continue
+
+            events_list.append(AgendaMatch(
+                fecha=fecha_csv,
+                hora=hora_evento,
+                competicion=competition,
+                evento=event_raw,
+                dial_M=dial,
+                tvg_id=target_tvg,
+                nombre_canal=nombre_canal_csv,
+                canal_agenda=canal_agenda_clean,
+                canal_agenda_real=canal_agenda_real, # [v1.8] New Field
+                dia_str_m3u=dia_m3u,
+                streams=tuple(streams)
+            ))
+
+    return events_list, discarded_list, days_found
+
+def split_agenda_days(html):
+    """[v1.17] Trocea la agenda en fragmentos, uno por div.events-day (hasta el siguiente)."""
+    starts = [m.start() for m in RE_DAY_START.finditer(html)]
+    return [html[a:b] for a, b in zip(starts, starts[1:] + [len(html)])]
+
+def agenda_context_key(tvg_index, name_map, rules):
+    """
+    [v1.17] Versión de todo lo que, además del HTML del día, influye en el cruce:
+    streams por TVG (lista maestra), mapa de nombres, reglas y el código (stage_key).
+    """
+    streams = sorted((tvg, s.ace_id, s.calidad_clean, s.calidad_tag, s.in_blacklist)
+                     for tvg, items in tvg_index.items() for s in items)
+    rule_rows = [(r['tipo'], r['patron'], r['reemplazo']) for r in rules['rules']]
+    return stage_key(json.dumps(streams), json.dumps(sorted(name_map.items())), json.dumps(rule_rows))
+
+def _dump_day_entry(entry):
+    """[v1.24] Los streams enlazados se guardan como lista de ace_id."""
+    return {'events': [list(m[:-1]) + [[s.ace_id for s in m.streams]] for m in entry['events']],
+            'discarded': entry['discarded'], 'days': entry['days'],
+            'lookups': entry['lookups'], 'rule_hits': entry['rule_hits']}
+
+def _load_day_entry(raw, streams_by_id):
+    """[v1.23] Los registros se guardan como listas JSON; al cargarlos se internan las cadenas."""
+    events = []
+    for e in raw['events']:
+        fields = [_intern_or_none(v) for v in e[:-1]]
+        events.append(AgendaMatch(*fields, streams=tuple(streams_by_id[aid] for aid in e[-1])))
+    return {'events': events,
+            'discarded': [Discard._make(map(_intern_or_none, d)) for d in raw['discarded']],
+            'days': raw['days'], 'lookups': raw['lookups'], 'rule_hits': raw['rule_hits']}
+
+def _intern_or_none(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def load_agenda_days_cache(context_key, streams_by_id):
+    path = Path(config.FILE_AGENDA_DAYS_CACHE)
+    if path.exists():
+        try:
+            cache = json.loads(path.read_text(encoding='utf-8'))
+            if cache.get('context') == context_key:
+                return {key: _load_day_entry(raw, streams_by_id) for key, raw in cache.get('days', {}).items()}
+        except (ValueError, TypeError, KeyError):
+            pass
+    return {}
+
+def save_agenda_days_cache(context_key, days):
+    Path(config.DIR_DEBUG).mkdir(exist_ok=True)
+    days = {key: _dump_day_entry(entry) for key, entry in days.items()}
+    Path(config.FILE_AGENDA_DAYS_CACHE).write_text(json.dumps({'context': context_key, 'days': days}, ensure_ascii=False),
+                                                   encoding='utf-8')
+
+def scrape_and_match(dial_map, name_map, master_db, html, rules, log=print, save_cache=True):
+    """[v1.29] Con save_cache=False (servidor) solo lee la caché de días: nunca la escribe."""
+    log(f"[6] Scraping de Agenda y cruce de datos...")
+    
+    # Índice de AceStreams por TVG para búsqueda rápida
+    tvg_index = {}
+    for item in master_db:
+        if item.final_tvg and item.final_tvg != "Unknown":
+            if item.final_tvg not in tvg_index: tvg_index[item.final_tvg] = []
+            tvg_index[item.final_tvg].append(item)
+
+    if not html:
+        return [], []
+
+    # [v1.17] Procesado incremental: cada día se identifica por el hash de su fragmento HTML
+    fragments = split_agenda_days(html) or [html]
+    context_key = agenda_context_key(tvg_index, name_map, rules)
+    streams_by_id = {s.ace_id: s for items in tvg_index.values() for s in items}
+    cached_days = load_agenda_days_cache(context_key, streams_by_id)
+    new_cache = {}
+
+    events_list = []
+    discarded_list = []
+    days_found = 0
+    reused = 0
+    for fragment in fragments:
+        key = sha256_text(fragment)
+        entry = cached_days.get(key) or new_cache.get(key)
+        if entry is not None:
+            # Los contadores de reglas del día se suman como si se hubiera vuelto a procesar
+            reused += 1
+            rules['lookups'] += entry['lookups']
+            for idx, hits in enumerate(entry['rule_hits']):
+                rules['hits'][idx] += hits
+        else:
+            lookups, hits = rules['lookups'], list(rules['hits'])
+            ev, di, nd = match_agenda_records(iter_agenda_records(fragment), tvg_index, name_map, rules)
+            entry = {'events': ev, 'discarded': di, 'days': nd, 'lookups': rules['lookups'] - lookups,
+                     'rule_hits': [after - before for after, before in zip(rules['hits'], hits)]}
+        new_cache[key] = entry
+        events_list.extend(entry['events'])
+        discarded_list.extend(entry['discarded'])
+        days_found += entry['days']
+
+    log(f"    -> {len(fragments)} bloques de agenda: {reused} desde caché, {len(fragments) - reused} procesados.")
+    if save_cache: save_agenda_days_cache(context_key, new_cache)
+
+    if not days_found:
+        log("    [ERROR] HTML sin eventos. Estructura web ha cambiado.")
+        return [], []
+
+    n_rows = sum(len(m.streams) for m in events_list)
+    log(f"    -> Encontrados {n_rows} combinaciones evento-stream ({len(events_list)} evento-canal).")
+    log(f"    -> Descartados {len(discarded_list)} intentos.")
+    count('events_matched', n_rows)
+    count('events_discarded', len(discarded_list))
+    report_agenda_rules(rules, log)
+    return events_list, discarded_list
+
+def generate_descartes_csv(discarded_list):
+    print(f"[8] Generando {config.FILE_DESCARTES}...")
+    out = AtomicOutput(config.FILE_DESCARTES, encoding='utf-8-sig', newline='')
+    with out as f:
+        fields = ['dial_M', 'nombre_canal_descartado', 'evento_descartado', 'motivo']
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for d in discarded_list:
+            w.writerow({
+                'dial_M': d.dial_M,
+                'nombre_canal_descartado': d.nombre_canal_descartado,
+                'evento_descartado': d.evento_descartado,
+                'motivo': d.motivo
+            })
+    if out.changed: print(f"    -> Generado CSV de descartes con {len(discarded_list)} registros.")
+    else: print(f"    -> CSV de descartes sin cambios ({len(discarded_list)} registros).")
+
+def iter_event_rows(events_list):
+    """
+    [v1.24] Expande cada AgendaMatch en una fila EventMatch por stream enlazado, en el
+    orden de salida (fecha, hora, competición, evento; estable). Es un generador:
+    las filas no se materializan en memoria.
+    """
+    for m in sorted(events_list, key=EVENT_SORT_KEY):
+        for s in m.streams:
+            yield EventMatch(m.fecha, m.hora, m.competicion, m.evento, s.ace_id, m.dial_M, m.tvg_id,
+                             m.nombre_canal, m.canal_agenda, m.canal_agenda_real, s.calidad_clean,
+                             s.in_blacklist, s.calidad_tag, m.dia_str_m3u, s.ace_id[:3])
+
+def event_m3u_entry(ev):
+    """[v1.29] Entrada M3U de una fila de eventos (compartida por generate_eventos_files y el servidor)."""
+    full_event_name = ev.evento
+    if not re.match(r'\d{2}:\d{2}', full_event_name):
+         full_event_name = f"{ev.hora}-{full_event_name}"
+    
+    final_name = f"{full_event_name} ({ev.nombre_canal}){ev.calidad_tag} ({ev.ace_prefix})"
+    group_title = f"{ev.dia_str_m3u} {ev.competicion}".strip()
+    return f'#EXTINF:-1 group-title="{group_title}" tvg-name="{final_name}",{final_name}\nhttp://127.0.0.1:6878/ace/getstream?id={ev.acestream_id}'
+
+def generate_eventos_files(event_rows):
+    """
+    [v1.24] Recibe las filas ya ordenadas (iter_event_rows o query_events) y las recorre una sola vez.
+    [v1.27] CSV y M3U se escriben a la vez en streaming; el M3U se descarta si no hay entradas.
+    """
+    print(f"[7] Generando ficheros de eventos...")
+    
+    csv_out = AtomicOutput(config.FILE_EVENTOS_CSV, encoding='utf-8-sig', newline='')
+    m3u_out = AtomicOutput(config.FILE_EVENTOS_M3U)
+    n_entries = 0
+    with csv_out as f, m3u_out as m3u:
+        # [v1.8] Añadida columna canal_agenda_real
+        fields = ['acestream_id', 'dial_M', 'tvg_id', 'fecha', 'hora', 'evento', 
+                  'competición', 'nombre_canal', 'canal_agenda', 'canal_agenda_real', 'calidad', 'lista_negra']
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for ev in event_rows:
+            w.writerow({
+                'acestream_id': ev.acestream_id,
+                'dial_M': ev.dial_M,
+                'tvg_id': ev.tvg_id,
+                'fecha': ev.fecha,
+                'hora': ev.hora,
+                'evento': ev.evento,
+                'competición': ev.competicion,
+                'nombre_canal': ev.nombre_canal,
+                'canal_agenda': ev.canal_agenda,
+                'canal_agenda_real': ev.canal_agenda_real,
+                'calidad': ev.calidad,
+                'lista_negra': ev.lista_negra
+            })
+
+            if ev.lista_negra == "yes": continue
+            if not n_entries: m3u.write(config.HEADER_M3U)
+            m3u.write("\n" + event_m3u_entry(ev))
+            n_entries += 1
+        if not n_entries: m3u_out.cancel()
+    print(f"    -> Generado CSV: {config.FILE_EVENTOS_CSV}" if csv_out.changed else f"    -> CSV sin cambios: {config.FILE_EVENTOS_CSV}")
+        
+    if n_entries:
+        state = "Generado" if m3u_out.changed else "Sin cambios"
+        print(f"    -> {state} M3U: {config.FILE_EVENTOS_M3U} con {n_entries} entradas.")
+    else:
+        print("    [ALERTA] No se generaron entradas M3U.")
@@ -0,0 +1,91 @@
+# ============================================================================================
+# CACHÉ DE DESCARGAS Y ETAPAS (v1.12)
+# ============================================================================================
+
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+from . import config
+
+NOT_MODIFIED = object()   # Marcador: el gateway respondió 304
+_RUN_CACHE = None
+_RUN_CACHE_LOCK = threading.Lock()
+
+def sha256_text(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def file_sha(path):
+    path = Path(path)
+    if not path.exists(): return ""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def get_run_cache():
+    """Caché persistente: validadores HTTP por URL y hash de entradas por etapa."""
+    global _RUN_CACHE
+    if _RUN_CACHE is None:
+        cache = {}
+        path = Path(config.FILE_RUN_CACHE)
+        if path.exists():
+            try:
+                cache = json.loads(path.read_text(encoding='utf-8'))
+            except ValueError:
+                cache = {}
+        cache.setdefault('urls', {})
+        cache.setdefault('stages', {})
+        _RUN_CACHE = cache
+    return _RUN_CACHE
+
+def save_run_cache(cache):
+    """Solo escribe si el contenido ha cambiado."""
+    content = json.dumps(cache, indent=2, sort_keys=True)
+    path = Path(config.FILE_RUN_CACHE)
+    if path.exists() and path.read_text(encoding='utf-8') == content: return
+    Path(config.DIR_NETWORK_STATE).mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding='utf-8')
+
+def conditional_headers(cache, url, local_sha):
+    """
+    Cabeceras If-None-Match / If-Modified-Since, solo si la copia local es
+    exactamente lo que este mismo gateway sirvió la última vez.
+    """
+    if config.RECORD_DIR: return None   # [v1.20] Al grabar se piden siempre los contenidos completos
+    entry = cache['urls'].get(url)
+    if not entry or not local_sha or entry.get('sha') != local_sha: return None
+    headers = {}
+    if entry.get('etag'): headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'): headers['If-Modified-Since'] = entry['last_modified']
+    return headers or None
+
+def remember_validators(cache, url, response, sha, **extra):
+    entry = {'sha': sha,
+             'etag': response.headers.get('ETag'),
+             'last_modified': response.headers.get('Last-Modified')}
+    entry.update(extra)
+    with _RUN_CACHE_LOCK:
+        cache['urls'][url] = entry
+
+_CODE_SHA = None
+
+def code_sha():
+    """[v2.0] Huella de todo el código del paquete (antes, del único script): cambiarlo invalida las etapas."""
+    global _CODE_SHA
+    if _CODE_SHA is None:
+        digest = hashlib.sha256()
+        for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+            digest.update(path.name.encode('utf-8') + b"\0")
+            digest.update(path.read_bytes())
+        _CODE_SHA = digest.hexdigest()
+    return _CODE_SHA
+
+def stage_key(*parts):
+    """Hash de las entradas de una etapa (hashes de ficheros/contenidos + versión del código)."""
+    h = hashlib.sha256(code_sha().encode('utf-8'))
+    for part in parts:
+        h.update(b"\0" + str(part).encode('utf-8'))
+    return h.hexdigest()
+
+def stage_unchanged(cache, name, key, outputs):
+    """Una etapa se salta si sus entradas no cambiaron y sus salidas siguen en disco."""
+    return cache['stages'].get(name) == key and all(Path(o).exists() for o in outputs)
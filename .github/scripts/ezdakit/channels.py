@@ -0,0 +1,237 @@
+# ============================================================================================
+# PROCESAMIENTO DE LISTAS (ELCANO / NEW ERA + FORZADOS)
+# ============================================================================================
+
+import sys
+import re
+import csv
+import operator
+from pathlib import Path
+from collections import namedtuple
+
+from . import config
+from .inputs import load_forced_channels
+from .metrics import count
+from .util import AtomicOutput, clean_channel_name, determine_quality, write_lines
+
+# [v1.13] Patrones M3U precompilados
+RE_M3U_ACE_ID = re.compile(r"(?:acestream://|id=|/)([0-9a-fA-F]{40})")
+RE_M3U_TVG_ID = re.compile(r'tvg-id="([^"]+)"')
+RE_M3U_GROUP = re.compile(r'group-title="([^"]+)"')
+
+# [v1.13] Registro compacto por entrada M3U
+M3UEntry = namedtuple('M3UEntry', ['ace_id', 'name', 'tvg', 'group', 'url', 'source'])
+
+# [v1.23] Registro de la lista maestra. Los tres primeros campos son la clave de orden
+# (grupo_ne o "ZZZ", nombre_supuesto, ace_id): master_db.sort() no necesita key y,
+# como ace_id es único, la comparación nunca pasa del tercer campo.
+Channel = namedtuple('Channel', ['grupo_orden', 'nombre_supuesto', 'ace_id',
+                                 'nombre_e', 'nombre_ne', 'tvg_e', 'tvg_ne', 'grupo_e', 'grupo_ne',
+                                 'calidad_tag', 'calidad_clean', 'source', 'url',
+                                 'final_group', 'final_tvg', 'in_blacklist', 'blacklist_real_name'])
+
+# Entradas ya parseadas durante la descarga: (fichero, source_tag) -> {ace_id: M3UEntry}
+_PARSED_M3U = {}
+
+def iter_m3u_entries(lines, source_tag):
+    """
+    [v1.13] Parser M3U en una sola pasada: cada #EXTINF se empareja con la siguiente
+    línea no vacía que no sea comentario. Acepta cualquier iterable de líneas.
+    """
+    inf = None
+    for raw in lines:
+        line = raw.strip()
+        if not line: continue
+        if line.startswith("#EXTINF"):
+            inf = line
+            continue
+        if raw.startswith("#") or inf is None: continue
+
+        m = RE_M3U_ACE_ID.search(line)
+        if m:
+            mt = RE_M3U_TVG_ID.search(inf)
+            mg = RE_M3U_GROUP.search(inf)
+            yield M3UEntry(
+                m.group(1),
+                inf.rsplit(',', 1)[-1].strip(),
+                mt.group(1).strip() if mt else "Unknown",
+                mg.group(1).strip() if mg else "",
+                line,
+                source_tag
+            )
+        inf = None
+
+def parse_m3u_lines(lines, source_tag):
+    return {entry.ace_id: entry for entry in iter_m3u_entries(lines, source_tag)}
+
+def parse_m3u(file_path, source_tag):
+    parsed = _PARSED_M3U.get((file_path, source_tag))
+    if parsed is not None: return parsed
+
+    path = Path(file_path)
+    if not path.exists(): return {}
+    with open(path, encoding='utf-8', errors='replace', newline='') as f:
+        return parse_m3u_lines(f, source_tag)
+
+def build_master_channel_list(blacklist, sources=None, log=print):
+    log(f"[3.1] Procesando y fusionando listas M3U...")
+
+    # [v1.26] Fuentes por prioridad y, para cada campo, las que pueden aportarlo
+    sources = sorted(sources or config.CHANNEL_SOURCES, key=operator.attrgetter('priority'))
+    unknown = [f"{src.tag}={src.column}" for src in sources if src.column and src.column not in config.SOURCE_COLUMNS]
+    if unknown:
+        # Sin esto sus columnas se perderían sin aviso (ver ChannelSource en config.py)
+        raise ValueError(f"Columnas de fuente no soportadas ({', '.join(unknown)}): usar column=None "
+                         f"o una de {', '.join(config.SOURCE_COLUMNS)}")
+    precedence = {field: [src for src in sources if field in src.fields] for field in config.ALL_FIELDS}
+    parsed = {src.tag: parse_m3u(src.file, src.tag) for src in sources}
+    count('entries_parsed', sum(len(entries) for entries in parsed.values()))
+    forced_channels = load_forced_channels(log)
+
+    # Hash-join por ace_id: {ace_id: {tag: M3UEntry}}
+    joined = {}
+    for src in sources:
+        for aid, entry in parsed[src.tag].items():
+            joined.setdefault(aid, {})[src.tag] = entry
+    for aid in forced_channels:
+        joined.setdefault(aid, {})
+
+    tvg_by_name = {tag: {v.name: v.tvg for v in entries.values() if v.tvg != "Unknown"}
+                   for tag, entries in parsed.items()}
+    master_db = []
+
+    for aid, found in joined.items():
+        f_data = forced_channels.get(aid, None)
+
+        # tvg-id propio de cada fuente, rellenado por nombre desde sus tvg_from
+        tvgs = {}
+        for src in sources:
+            entry = found.get(src.tag)
+            if not entry: continue
+            tvg = entry.tvg
+            if not tvg or tvg == "Unknown":
+                for other in src.tvg_from:
+                    if entry.name in tvg_by_name.get(other, ()):
+                        tvg = tvg_by_name[other][entry.name]
+                        break
+            tvgs[src.tag] = tvg
+
+        def pick(field, valid=bool, default=''):
+            for src in precedence[field]:
+                entry = found.get(src.tag)
+                if entry is None: continue
+                value = tvgs[src.tag] if field == 'tvg' else getattr(entry, field)
+                if valid(value): return value
+            return default
+
+        # Columnas propias de cada fuente en correspondencias.csv
+        columns = {}
+        for src in sources:
+            if not src.column: continue
+            entry = found.get(src.tag)
+            columns[f"nombre_{src.column}"] = entry.name if entry else ''
+            columns[f"grupo_{src.column}"] = sys.intern(entry.group) if entry else ''
+            columns[f"tvg_{src.column}"] = sys.intern(tvgs[src.tag]) if entry else ''
+
+        raw_name_for_clean = pick('name')
+        
+        # [v1.1] clean_channel_name ahora devuelve MAYUSCULAS
+        nombre_supuesto = clean_channel_name(raw_name_for_clean, aid[-4:])
+        if not nombre_supuesto: nombre_supuesto = "DESCONOCIDO"
+        
+        quality_tag = determine_quality(*(entry.name for entry in found.values()))
+        clean_quality = quality_tag.strip().replace("(", "").replace(")", "")
+        
+        final_source = next((src.tag for src in sources if src.tag in found), "E")
+        final_url = pick('url', valid=lambda v: True, default=None)
+        final_group = pick('group') or "OTROS"
+        final_tvg = pick('tvg', valid=lambda v: bool(v) and v != "Unknown") or "Unknown"
+
+        if f_data:
+            nombre_supuesto = f_data['name']
+            final_group = f_data['group']
+            final_tvg = f_data['tvg']
+            clean_quality = f_data['quality']
+            quality_tag = f" ({clean_quality})" if clean_quality else ""
+            final_source = "F"
+            if not final_url: final_url = f"acestream://{aid}"
+
+        in_bl = "yes" if aid in blacklist else "no"
+        bl_real_name = blacklist.get(aid, "")
+
+        # [v1.23] Cadenas muy repetidas (grupos, calidades, tvg) internadas: una sola copia en memoria
+        master_db.append(Channel(
+            grupo_orden=sys.intern(columns.get('grupo_ne') or "ZZZ"),
+            nombre_supuesto=nombre_supuesto,
+            ace_id=aid,
+            nombre_e=columns.get('nombre_e', ''),
+            nombre_ne=columns.get('nombre_ne', ''),
+            tvg_e=columns.get('tvg_e', ''),
+            tvg_ne=columns.get('tvg_ne', ''),
+            grupo_e=columns.get('grupo_e', ''),
+            grupo_ne=columns.get('grupo_ne', ''),
+            calidad_tag=sys.intern(quality_tag),
+            calidad_clean=sys.intern(clean_quality),
+            source=final_source,
+            url=final_url,
+            final_group=sys.intern(final_group),
+            final_tvg=sys.intern(final_tvg),
+            in_blacklist=in_bl,
+            blacklist_real_name=bl_real_name
+        ))
+    
+    # [v1.17] ace_id como desempate: orden estable entre ejecuciones (necesario para la caché por día)
+    # [v1.23] El orden va en los primeros campos de Channel
+    master_db.sort()
+    log(f"    -> Procesados y ordenados {len(master_db)} canales únicos.")
+    return master_db
+
+# ============================================================================================
+# GENERADORES (CSV, M3U)
+# ============================================================================================
+
+def generate_correspondencias(db):
+    print(f"[4] Generando {config.FILE_CORRESPONDENCIAS}...")
+    out = AtomicOutput(config.FILE_CORRESPONDENCIAS, encoding='utf-8-sig', newline='')
+    with out as f:
+        fields = ['acestream_id', 'nombre_e', 'nombre_ne', 'tvg-id_e', 'tvg-id_ne', 
+                  'nombre_supuesto', 'grupo_e', 'grupo_ne', 'calidad', 'lista_negra', 'canal_real']
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for item in db:
+            w.writerow({
+                'acestream_id': item.ace_id,
+                'nombre_e': item.nombre_e,
+                'nombre_ne': item.nombre_ne,
+                'tvg-id_e': item.tvg_e,
+                'tvg-id_ne': item.tvg_ne,
+                'nombre_supuesto': item.nombre_supuesto,
+                'grupo_e': item.grupo_e,
+                'grupo_ne': item.grupo_ne,
+                'calidad': item.calidad_clean,
+                'lista_negra': item.in_blacklist,
+                'canal_real': item.blacklist_real_name
+            })
+    print("    -> Fichero generado correctamente." if out.changed else "    -> Sin cambios (no se reescribe).")
+
+def channel_group(item):
+    """group-title con el que aparece el canal en ezdakit.m3u: siempre el de New Era, no el de la fuente preferente."""
+    if item.in_blacklist == "yes": return "ZZ_Canales_KO"
+    return item.grupo_ne if item.grupo_ne else "OTROS"
+
+def channel_m3u_entry(item):
+    """[v1.29] Entrada M3U de un canal (compartida por generate_ezdakit_m3u y el servidor)."""
+    prefix = item.ace_id[:3]
+    display_name = f"{item.nombre_supuesto}{item.calidad_tag} ({item.source}-{prefix})"
+    if item.in_blacklist == "yes":
+        suffix = item.blacklist_real_name if item.blacklist_real_name else "BLACKLIST"
+        display_name += f" >>> {suffix}"
+    return f'#EXTINF:-1 tvg-id="{item.final_tvg}" tvg-name="{display_name}" group-title="{channel_group(item)}",{display_name}\n{item.url}'
+
+def generate_ezdakit_m3u(db):
+    print(f"[5] Generando {config.FILE_EZDAKIT}...")
+    # [v1.27] Escritura en streaming: la lista no se materializa como una sola cadena
+    out = AtomicOutput(config.FILE_EZDAKIT)
+    with out as f:
+        write_lines(f, config.HEADER_M3U, map(channel_m3u_entry, db))
+    print(f"    -> {len(db)} canales escritos." if out.changed else f"    -> {len(db)} canales, sin cambios (no se reescribe).")
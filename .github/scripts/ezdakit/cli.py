@@ -0,0 +1,139 @@
+# ============================================================================================
+# LÍNEA DE ÓRDENES (v2.0)
+# ============================================================================================
+# update_system.py [orden] [opciones]      (sin orden = all, como hasta v1.30)
+#
+#   all       Descarga listas y agenda y regenera todas las salidas.
+#   channels  Solo listas: descarga, correspondencias.csv, ezdakit.m3u e histórico.
+#   events    Solo agenda: descarga y ficheros de eventos con las listas locales.
+#   render    Regenera las salidas desde las copias locales, sin red (p.ej. tras editar lista_negra.csv).
+#   probe     Sondea los acestreams contra el motor local y regenera la lista negra automática (v2.1).
+#   serve     Servidor local de listas filtradas (v1.29).
+#   daemon    Proceso persistente con refresco periódico (v1.30).
+#
+# Este módulo solo importa argparse y config; el pipeline y sus dependencias se cargan
+# después de aplicar las opciones.
+
+import sys
+import argparse
+
+from . import config
+
+COMMANDS = ('all', 'channels', 'events', 'render', 'probe', 'serve', 'daemon')
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--testing", action="store_true", help="Ficheros con sufijo _testing")
+    common.add_argument("--sqlite", action="store_true", help="Sincroniza canales y eventos en .debug/store.sqlite")
+    common.add_argument("--secuencial", action="store_true", help="Ejecuta las etapas en serie")
+    common.add_argument("--profile", action="store_true", help="cProfile por etapa en .debug/profile/")
+    common.add_argument("--tracemalloc", action="store_true", help="Pico de memoria Python por etapa")
+    common.add_argument("--record", metavar="DIR", help="Graba las respuestas de los gateways en DIR")
+    common.add_argument("--replay", metavar="DIR", help="Reproduce las respuestas grabadas en DIR")
+
+    parser = argparse.ArgumentParser(prog="update_system.py",
+                                     description="Actualización de canales y agenda deportiva")
+    sub = parser.add_subparsers(dest="command", metavar="orden")
+    sub.add_parser("all", parents=[common], help="Listas, agenda y todas las salidas (por defecto)")
+    sub.add_parser("channels", parents=[common], help="Solo listas de canales y sus salidas")
+    sub.add_parser("events", parents=[common], help="Solo agenda y ficheros de eventos")
+    sub.add_parser("render", parents=[common], help="Regenera las salidas sin red")
+    probe = sub.add_parser("probe", parents=[common], help="Sondea los acestreams y actualiza la lista negra automática")
+    probe.add_argument("--motor", default=config.ENGINE_URL, metavar="URL", help="API HTTP del motor AceStream")
+    probe.add_argument("--concurrencia", type=int, metavar="N", help="Sondeos simultáneos (32 por defecto)")
+    probe.add_argument("--timeout", type=float, metavar="S", help="Segundos por ace_id (8 por defecto)")
+    serve = sub.add_parser("serve", parents=[common], help="Servidor local de listas")
+    serve.add_argument("--puerto", type=int, default=8000)
+    serve.add_argument("--host", metavar="H", help="Interfaz de escucha (127.0.0.1 por defecto; 0.0.0.0 para todas)")
+    daemon = sub.add_parser("daemon", parents=[common], help="Proceso persistente con refresco periódico")
+    daemon.add_argument("--cada-agenda", type=float, default=10, metavar="MIN")
+    daemon.add_argument("--cada-listas", type=float, default=60, metavar="MIN")
+    daemon.add_argument("--ciclos", type=int, metavar="N", help="Termina tras N ciclos")
+    daemon.add_argument("--servir", type=int, nargs="?", const=8000, metavar="PUERTO",
+                        help="Sirve además las listas (puerto 8000 por defecto)")
+    daemon.add_argument("--host", metavar="H", help="Interfaz de escucha de --servir (127.0.0.1 por defecto)")
+    return parser
+
+def _value_options(parser):
+    """Opciones (de todas las subórdenes) que toman valor: {opción: nargs}."""
+    options = {}
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            for sub in action.choices.values():
+                options.update(_value_options(sub))
+        elif action.option_strings and action.nargs != 0:
+            options.update(dict.fromkeys(action.option_strings, action.nargs))
+    return options
+
+def _first_positional(argv, value_options):
+    """Índice del primer argumento posicional, saltando los valores de las opciones (--record all)."""
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if not arg.startswith("-"):
+            return i
+        if arg not in value_options:   # Sin valor, o con él pegado (--record=DIR)
+            i += 1
+        elif value_options[arg] == "?":
+            i += 2 if i + 1 < len(argv) and not argv[i + 1].startswith("-") and argv[i + 1] not in COMMANDS else 1
+        else:
+            i += 2
+    return None
+
+def parse_args(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    parser = build_parser()
+    first = _first_positional(argv, _value_options(parser))
+    if first is not None and argv[first] in COMMANDS:
+        # Las opciones comunes pueden ir antes de la orden (update_system.py --testing render)
+        argv.insert(0, argv.pop(first))
+    elif not {"-h", "--help"} & set(argv):
+        # Flags de modo anteriores a v2.0: --demonio [...] y --servir [PUERTO]
+        if "--demonio" in argv:
+            argv.remove("--demonio")
+            argv.insert(0, "daemon")
+        elif "--servir" in argv:
+            i = argv.index("--servir")
+            argv[i:i + 1] = ["--puerto"] if i + 1 < len(argv) and argv[i + 1].isdigit() else []
+            argv.insert(0, "serve")
+        else:
+            argv.insert(0, "all")
+    return parser.parse_args(argv)
+
+def print_banner(command):
+    print(f"######################################################################")
+    print(f"### INICIANDO SISTEMA DE ACTUALIZACIÓN {'(MODO TESTING)' if config.TEST_MODE else '(PRODUCCIÓN)'}")
+    print(f"### VERSIÓN DEL SCRIPT: {config.VERSION}")
+    print(f"### Orden: {command}")
+    print(f"### Sufijo de archivos de salida: '{config.SUFFIX}'")
+    print(f"######################################################################\n")
+
+def main(argv=None):
+    args = parse_args(argv)
+    config.configure(testing=args.testing, profile=args.profile, trace_memory=args.tracemalloc,
+                     record=args.record, replay=args.replay, sqlite=args.sqlite, sequential=args.secuencial)
+    print_banner(args.command)
+
+    if args.command == "serve":
+        from .server import serve_playlists
+        serve_playlists(args.puerto, args.host)
+        return
+    if args.command == "probe":
+        from .pipeline import run_probe
+        run_probe(args.motor, args.concurrencia, args.timeout)
+        return
+    if args.command == "daemon":
+        from .pipeline import run_daemon
+        intervals = {'agenda': 60 * args.cada_agenda, 'lists': 60 * args.cada_listas}
+        run_daemon(intervals, args.ciclos, args.servir, args.host)
+        return
+
+    from .pipeline import run_once
+    if args.command == "channels":
+        run_once(targets=('channels',), lists_due=True, agenda_due=False)
+    elif args.command == "events":
+        run_once(targets=('events',), lists_due=False, agenda_due=True)
+    elif args.command == "render":
+        run_once(lists_due=False, agenda_due=False)
+    else:
+        run_once()
@@ -0,0 +1,160 @@
+# ============================================================================================
+# CONFIGURACIÓN Y MODO TESTING
+# ============================================================================================
+# [v2.0] Ya no se lee sys.argv al importar: la CLI llama a configure() con las opciones de la
+# línea de órdenes. El resto de módulos lee siempre config.X en el momento de usarlo, así que
+# configure() surte efecto aunque los módulos ya estén importados.
+
+import os
+from collections import namedtuple
+
+VERSION = "2.1"
+
+TEST_MODE = False
+TRACE_MEMORY = False
+PROFILE_MODE = False
+RECORD_DIR = None
+REPLAY_DIR = None
+USE_STORE = False
+# [v1.25] Etapas en serie (también con --profile / --tracemalloc, que no distinguen hilos)
+SEQUENTIAL = False
+SUFFIX = ""
+
+# Carpetas
+DIR_CANALES = "canales"
+DIR_DEBUG = ".debug"
+DIR_HISTORY = "history"
+
+# Función para gestionar nombres de archivo con sufijo
+def get_path(filename):
+    base, ext = os.path.splitext(filename)
+    if "/" in base:
+        folder, name = base.rsplit("/", 1)
+        return f"{folder}/{name}{SUFFIX}{ext}"
+    return f"{base}{SUFFIX}{ext}"
+
+PROXIES_RETENTION_DAYS = 30
+METRICS_RETENTION_DAYS = 30
+PROFILE_TOP_N = 25
+
+# [v1.21] Histórico de listas
+FILE_HISTORY_INDEX = f"{DIR_HISTORY}/index.json"
+HISTORY_KEYFRAME_EVERY = 24   # Cada N deltas encadenados se guarda la lista completa
+HISTORY_TS_FORMAT = '%Y-%m-%d_%H-%M'
+
+# URLs
+IPNS_HASH = "k2k4r8lm8tkmuxbc8lkmq1in3v0oya1p6pe9o5bu0hu30br5ko08k2gb"
+#anterior: k2k4r8oqlcjxsritt5mczkcn4mmvcmymbqw7113fz2flkrerfwfps004
+URLS_ELCANO = [
+    "https://ipfs.io/ipns/k51qzi5uqu5di462t7j4vu4akwfhvtjhy88qbupktvoacqfqe9uforjvhyi4wr/hashes.m3u",
+    "https://gateway.pinata.cloud/ipns/k51qzi5uqu5di462t7j4vu4akwfhvtjhy88qbupktvoacqfqe9uforjvhyi4wr/hashes.m3u",
+    "https://k51qzi5uqu5di462t7j4vu4akwfhvtjhy88qbupktvoacqfqe9uforjvhyi4wr.ipns.dweb.link/hashes.m3u",
+    "https://cloudflare-ipfs.com/ipns/k51qzi5uqu5di462t7j4vu4akwfhvtjhy88qbupktvoacqfqe9uforjvhyi4wr/hashes.m3u"
+]
+URLS_NEW_ERA = [
+    f"https://ipfs.io/ipns/{IPNS_HASH}/data/listas/lista_iptv.m3u",
+    f"https://gateway.pinata.cloud/ipns/{IPNS_HASH}/data/listas/lista_iptv.m3u",
+    f"https://{IPNS_HASH}.ipns.dweb.link/data/listas/lista_iptv.m3u",
+    f"https://cloudflare-ipfs.com/ipns/{IPNS_HASH}/data/listas/lista_iptv.m3u"
+]
+
+# [v1.26] Registro de listas de origen. Se descargan todas a la vez y se fusionan por ace_id.
+#   priority: menor = preferente; para cada campo gana la primera fuente (por prioridad) con valor.
+#   fields:   campos que la fuente puede aportar a la fusión ('name', 'group', 'tvg', 'url').
+#   column:   sufijo de sus columnas propias en correspondencias.csv (nombre_e, tvg-id_ne...), o None.
+#             Solo existen las de SOURCE_COLUMNS (campos fijos de Channel, cabecera del CSV y tabla
+#             del almacén): una fuente nueva debe usar column=None o build_master_channel_list falla.
+#   tvg_from: fuentes cuyo mapa nombre -> tvg-id rellena los tvg-id desconocidos de esta.
+# La prioridad decide nombre, tvg-id y URL del canal fusionado. El group-title de ezdakit.m3u y el
+# orden de la lista salen siempre de la columna de New Era (grupo_ne), sea cual sea la prioridad.
+ChannelSource = namedtuple('ChannelSource', ['tag', 'label', 'file', 'urls', 'priority', 'fields', 'column', 'tvg_from'])
+ALL_FIELDS = ('name', 'group', 'tvg', 'url')
+SOURCE_COLUMNS = ('e', 'ne')
+
+# URLs Agenda (Limpias)
+URLS_AGENDA = [
+    f"https://ipfs.io/ipns/{IPNS_HASH}/",
+    f"https://cloudflare-ipfs.com/ipns/{IPNS_HASH}/",
+    f"https://w3s.link/ipns/{IPNS_HASH}/",
+    f"https://{IPNS_HASH}.ipns.dweb.link/",
+    f"https://dweb.link/ipns/{IPNS_HASH}/",
+    f"https://gateway.pinata.cloud/ipns/{IPNS_HASH}/"
+]
+
+# [v2.1] API HTTP del motor AceStream (la misma que usan las entradas de ezdakit_eventos.m3u)
+ENGINE_URL = "http://127.0.0.1:6878"
+
+# [v1.9] Tiempos límite de descarga (segundos): conexión y lectura por mirror + límite global
+TIMEOUT_CONNECT = 10
+TIMEOUT_READ = 30
+TIMEOUT_TOTAL = 90
+
+HEADER_M3U = """#EXTM3U url-tvg="https://raw.githubusercontent.com/davidmuma/EPG_dobleM/refs/heads/master/guiatv.xml,https://epgshare01.online/epgshare01/epg_ripper_NL1.xml.gz,https://raw.githubusercontent.com/davidmuma/EPG_dobleM/master/guiatv.xml" refresh="3600"
+#EXTVLCOPT:network-caching=1000
+"""
+
+def _define_paths():
+    """Rutas que llevan el sufijo de testing; se recalculan en configure()."""
+    global FILE_ELCANO, FILE_NEW_ERA, FILE_EZDAKIT, FILE_CORRESPONDENCIAS, FILE_EVENTOS_CSV, FILE_EVENTOS_M3U
+    global FILE_DESCARTES, FILE_RUN_CACHE, FILE_AGENDA_CACHE, FILE_AGENDA_DAYS_CACHE, FILE_LAST_RUN, FILE_METRICS
+    global DIR_PROFILE, FILE_BLACKLIST, FILE_DIAL_MAP, FILE_FORZADOS, FILE_REGLAS_AGENDA, FILE_STORE, CHANNEL_SOURCES
+    global FILE_AUTO_BLACKLIST, FILE_LIVENESS_CACHE
+    global DIR_NETWORK_STATE, FILE_PROXIES_LOG, DIR_PROXIES_LOG, FILE_PROXIES_SUMMARY, FILE_GATEWAY_HEALTH
+
+    # Ficheros de SALIDA (Llevan sufijo en testing)
+    FILE_ELCANO = get_path("elcano.m3u")
+    FILE_NEW_ERA = get_path("new_era.m3u")
+    FILE_EZDAKIT = get_path("ezdakit.m3u")
+    FILE_CORRESPONDENCIAS = get_path(f"{DIR_CANALES}/correspondencias.csv")
+    FILE_EVENTOS_CSV = get_path(f"{DIR_CANALES}/eventos_canales.csv")
+    FILE_EVENTOS_M3U = get_path("ezdakit_eventos.m3u")
+    FILE_DESCARTES = get_path(f"{DIR_CANALES}/descartes.csv")
+    FILE_AGENDA_CACHE = get_path(f"{DIR_DEBUG}/agenda.html")
+    FILE_AGENDA_DAYS_CACHE = get_path(f"{DIR_DEBUG}/agenda_days.json")
+    FILE_LAST_RUN = get_path(f"{DIR_DEBUG}/last_run.json")
+    FILE_METRICS = get_path(f"{DIR_DEBUG}/metrics.jsonl")
+    DIR_PROFILE = get_path(f"{DIR_DEBUG}/profile")
+
+    # Estado de red: salud de gateways, log de proxies y validadores HTTP de la caché de ejecución.
+    # [v1.20] Con --replay va aparte (.debug/replay/): el tráfico grabado no toca el circuit
+    # breaker ni los ETag de producción
+    DIR_NETWORK_STATE = f"{DIR_DEBUG}/replay" if REPLAY_DIR else DIR_DEBUG
+    FILE_RUN_CACHE = get_path(f"{DIR_NETWORK_STATE}/run_cache.json")
+    FILE_PROXIES_LOG = f"{DIR_NETWORK_STATE}/proxies.log"   # Formato antiguo (v1.10-v1.27): se migra a DIR_PROXIES_LOG
+    DIR_PROXIES_LOG = f"{DIR_NETWORK_STATE}/proxies"
+    FILE_PROXIES_SUMMARY = f"{DIR_PROXIES_LOG}/summary.json"
+    FILE_GATEWAY_HEALTH = f"{DIR_NETWORK_STATE}/gateways_health.json"
+
+    # Ficheros de ENTRADA
+    FILE_BLACKLIST = get_path(f"{DIR_CANALES}/lista_negra.csv")
+    FILE_DIAL_MAP = get_path(f"{DIR_CANALES}/listado_canales.csv")
+    FILE_FORZADOS = get_path(f"{DIR_CANALES}/canales_forzados.csv")
+    FILE_REGLAS_AGENDA = get_path(f"{DIR_CANALES}/reglas_agenda.csv")
+
+    # [v2.1] Lista negra automática (la genera el sondeo de acestreams) y caché de resultados
+    FILE_AUTO_BLACKLIST = get_path(f"{DIR_CANALES}/lista_negra_auto.csv")
+    FILE_LIVENESS_CACHE = get_path(f"{DIR_DEBUG}/liveness.json")
+
+    # [v1.22] Almacén SQLite (opcional, --sqlite)
+    FILE_STORE = get_path(f"{DIR_DEBUG}/store.sqlite")
+
+    CHANNEL_SOURCES = [
+        ChannelSource('E', "Elcano", FILE_ELCANO, URLS_ELCANO, priority=1, fields=ALL_FIELDS, column='e', tvg_from=('N',)),
+        ChannelSource('N', "New Era", FILE_NEW_ERA, URLS_NEW_ERA, priority=0, fields=ALL_FIELDS, column='ne', tvg_from=()),
+    ]
+
+_define_paths()
+
+def configure(testing=False, profile=False, trace_memory=False, record=None, replay=None, sqlite=False,
+              sequential=False):
+    """Aplica las opciones de la línea de órdenes (ver cli.py)."""
+    global TEST_MODE, TRACE_MEMORY, PROFILE_MODE, RECORD_DIR, REPLAY_DIR, USE_STORE, SEQUENTIAL, SUFFIX
+    TEST_MODE = testing
+    PROFILE_MODE = profile
+    TRACE_MEMORY = trace_memory
+    RECORD_DIR = record
+    REPLAY_DIR = replay
+    USE_STORE = sqlite
+    SEQUENTIAL = sequential or profile or trace_memory
+    SUFFIX = "_testing" if testing else ""
+    _define_paths()
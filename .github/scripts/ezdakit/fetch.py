@@ -0,0 +1,435 @@
+# ============================================================================================
+# DESCARGAS (RED)
+# ============================================================================================
+# [v2.0] Todo el acceso a red: mirrors M3U, sesiones por gateway y sondeo de la agenda.
+# requests y cloudscraper solo se cargan cuando una etapa importa este módulo.
+
+import os
+import sys
+import time
+import datetime
+import requests
+import cloudscraper
+import io
+import socket
+import shutil
+import tempfile
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+from . import config
+from .agenda import RE_EVENT_ROW, first_agenda_day
+from .cache import NOT_MODIFIED, conditional_headers, file_sha, get_run_cache, remember_validators, sha256_text
+from .channels import _PARSED_M3U, parse_m3u_lines
+from .health import _gateway_key, get_gateway_health, rank_gateways, record_gateway_result, save_gateway_health
+from .metrics import count
+from .proxylog import update_proxies_log
+from .scheduler import call_buffered
+
+class DownloadCancelled(Exception):
+    pass
+
+class _ResponseStream(io.RawIOBase):
+    """[v1.13] Adaptador binario sobre iter_content que aborta si otro mirror ha ganado."""
+    def __init__(self, response, cancel_event):
+        self._chunks = response.iter_content(chunk_size=65536)
+        self._cancel_event = cancel_event
+        self._buf = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._cancel_event.is_set(): raise DownloadCancelled()
+        while not self._buf:
+            try:
+                self._buf = next(self._chunks)
+            except StopIteration:
+                return 0
+            count('bytes_downloaded', len(self._buf))
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+def _abort_response(r):
+    """
+    [v2.0] Corta una respuesta que otro hilo sigue leyendo. r.close() a secas espera al lector
+    (que tiene tomado el búfer del socket) hasta que llega el siguiente bloque o TIMEOUT_READ;
+    shutdown() despierta la lectura en curso, que falla y libera el búfer.
+    """
+    # urllib3 -> http.client -> makefile() -> SocketIO: el socket del cuerpo aunque la conexión ya no lo tenga
+    fp = getattr(getattr(r.raw, '_fp', None), 'fp', None)
+    sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    if sock is not None:
+        try: sock.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+    try: r.close()
+    except Exception: pass
+
+def _fetch_mirror(session, url, cancel_event, active, headers=None, source_tag=None):
+    """
+    [v1.9] Descarga un mirror en streaming. Aborta en cuanto otro mirror ha ganado (cancel_event).
+    [v1.12] Devuelve NOT_MODIFIED si el gateway responde 304 a la petición condicional.
+    [v1.13] Una sola pasada por líneas: se vuelca a un temporal, se calcula el hash y,
+    si hay source_tag, se parsea a la vez. Devuelve (temporal, sha, entradas) si es un M3U válido.
+    """
+    if cancel_event.is_set(): return None
+    start = time.monotonic()
+    try:
+        r = session.get(_route_url(url), timeout=(config.TIMEOUT_CONNECT, config.TIMEOUT_READ), stream=True, headers=headers)
+    except requests.RequestException as e:
+        _record_snapshot(url, None, None, None, time.monotonic() - start, error=_short_error(e))
+        raise
+    active[url] = r
+    tmp = None
+    try:
+        if r.status_code == 304 and headers: return NOT_MODIFIED
+        if r.status_code != 200:
+            _record_snapshot(url, r.status_code, r.headers, b"", time.monotonic() - start)
+            return None
+
+        # Misma decodificación que r.text; newline='' conserva los saltos originales
+        text_stream = io.TextIOWrapper(io.BufferedReader(_ResponseStream(r, cancel_event)),
+                                       encoding=r.encoding or 'utf-8', errors='replace', newline='')
+        tmp = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', suffix='.m3u', delete=False)
+        hasher = hashlib.sha256()
+        state = {'head': ""}
+
+        def tee(lines):
+            for line in lines:
+                if cancel_event.is_set(): raise DownloadCancelled()
+                if state['head'] is not None:
+                    state['head'] += line
+                    if len(state['head']) >= 200:
+                        if "#EXTM3U" not in state['head'][:200]: raise DownloadCancelled()
+                        state['head'] = None
+                tmp.write(line)
+                hasher.update(line.encode('utf-8'))
+                yield line
+
+        if source_tag:
+            entries = parse_m3u_lines(tee(text_stream), source_tag)
+        else:
+            entries = None
+            for _ in tee(text_stream): pass
+        tmp.close()
+
+        if state['head'] is not None and "#EXTM3U" not in state['head']: return None
+        if cancel_event.is_set(): return None   # Otro mirror ganó mientras terminábamos
+        sha = hasher.hexdigest()
+        remember_validators(get_run_cache(), url, r, sha)
+        if config.RECORD_DIR:
+            _record_snapshot(url, 200, r.headers, Path(tmp.name).read_bytes(), time.monotonic() - start)
+        result = (tmp.name, sha, entries)
+        tmp = None
+        return result
+    except DownloadCancelled:
+        return None
+    finally:
+        active.pop(url, None)
+        r.close()
+        if tmp is not None:
+            tmp.close()
+            os.unlink(tmp.name)
+
+def _discard_mirror_result(fut):
+    """[v2.0] Borra el temporal de un mirror que terminó pero perdió la carrera."""
+    if fut.cancelled() or fut.exception() is not None: return
+    result = fut.result()
+    if isinstance(result, tuple):
+        try: os.unlink(result[0])
+        except OSError: pass
+
+def download_file(urls, output_filename, source_tag=None):
+    """
+    [v1.9] Lanza todos los mirrors a la vez y se queda con la primera respuesta que
+    pase el control #EXTM3U. El resto de peticiones se cancelan.
+    [v1.12] Peticiones condicionales contra la copia local; si no hay cambios no se escribe.
+    [v1.13] Con source_tag, las entradas se parsean durante la descarga y quedan
+    disponibles para parse_m3u sin releer el fichero.
+    """
+    print(f"   -> Descargando {output_filename}...")
+    health = get_gateway_health()
+    urls = rank_gateways(health, urls)
+
+    cancel_event = threading.Event()
+    active = {}
+    winner = None
+    cache = get_run_cache()
+    local_sha = file_sha(output_filename)
+    executor = ThreadPoolExecutor(max_workers=max(len(urls), 1))
+    start = time.monotonic()
+    futures = {executor.submit(_fetch_mirror, http_session(url), url, cancel_event, active,
+                               conditional_headers(cache, url, local_sha), source_tag): url for url in urls}
+    count('gateways_tried', len(urls))
+
+    try:
+        for fut in as_completed(futures, timeout=config.TIMEOUT_TOTAL):
+            url = futures[fut]
+            try:
+                result = fut.result()
+            except Exception:
+                result = None
+            record_gateway_result(health, url, bool(result), time.monotonic() - start)
+            if result:
+                winner = (url, result)
+                break
+    except FuturesTimeout:
+        print(f"      [AVISO] Límite global de {config.TIMEOUT_TOTAL}s alcanzado.")
+    finally:
+        cancel_event.set()
+        for r in list(active.values()):
+            _abort_response(r)
+        # Los que ya terminaron (o terminen después) dejan un temporal que nadie recoge
+        for fut, url in futures.items():
+            if not winner or url != winner[0]:
+                fut.add_done_callback(_discard_mirror_result)
+        executor.shutdown(wait=False, cancel_futures=True)
+        save_gateway_health(health)
+
+    if winner:
+        url, result = winner
+        if result is NOT_MODIFIED:
+            print(f"      [OK] Sin cambios (304) en {url[:40]}...")
+            return True
+
+        tmp_name, sha, entries = result
+        if entries is not None:
+            _PARSED_M3U[(output_filename, source_tag)] = entries
+        if sha == local_sha:
+            os.unlink(tmp_name)
+            print(f"      [OK] Sin cambios (hash) en {url[:40]}...")
+        else:
+            shutil.move(tmp_name, output_filename)
+            print(f"      [OK] Fuente: {url[:40]}...")
+        return True
+
+    print(f"      [ERROR] No se pudo descargar {output_filename}")
+    return False
+
+# [v2.0] replay (y con él http.server) solo se importa al grabar o reproducir
+def _route_url(url):
+    if not config.REPLAY_DIR: return url
+    from .replay import route_url
+    return route_url(url)
+
+def _record_snapshot(*args, **kwargs):
+    if not config.RECORD_DIR: return
+    from .replay import record_snapshot
+    record_snapshot(*args, **kwargs)
+
+# ============================================================================================
+# SESIONES HTTP (v1.30)
+# ============================================================================================
+
+# [v1.30] Sesiones HTTP reutilizables por gateway: conexiones TLS (y, en la agenda, las cookies
+# del reto de Cloudflare) se conservan entre descargas y, en modo demonio, entre ciclos.
+_HTTP_SESSIONS = {}
+_HTTP_SESSIONS_LOCK = threading.Lock()
+HTTP_POOL_SIZE = 4
+
+def http_session(url, kind='lists'):
+    """Sesión del gateway de 'url': requests para las listas, cloudscraper para la agenda."""
+    key = (kind, _gateway_key(url))
+    with _HTTP_SESSIONS_LOCK:
+        session = _HTTP_SESSIONS.get(key)
+        if session is not None:
+            count('sessions_reused')
+            return session
+        if kind == 'agenda':
+            session = cloudscraper.create_scraper(browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True})
+        else:
+            session = requests.Session()
+            session.headers.update({"User-Agent": "Mozilla/5.0"})
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        _HTTP_SESSIONS[key] = session
+        count('sessions_created')
+        return session
+
+def close_http_sessions():
+    with _HTTP_SESSIONS_LOCK:
+        for session in _HTTP_SESSIONS.values():
+            session.close()
+        _HTTP_SESSIONS.clear()
+
+# ============================================================================================
+# DESCARGA DE LISTAS
+# ============================================================================================
+
+def download_channel_lists(sources=None):
+    """
+    [v1.26] Descarga todas las fuentes a la vez (antes New Era solo se pedía si fallaba
+    Elcano). Una fuente caída conserva su copia anterior; sin ninguna no se puede seguir.
+    """
+    sources = sources or config.CHANNEL_SOURCES
+    print(f"[3] Descargando listas M3U ({len(sources)} fuentes en paralelo)...")
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        futures = [executor.submit(call_buffered, download_file, src.urls, src.file, src.tag) for src in sources]
+        results = [fut.result() for fut in futures]
+    for _, text in results:
+        print(text, end="")
+    if not any(ok for ok, _ in results):
+        print("[ERROR CRÍTICO] No se pudo descargar ninguna lista.")
+        sys.exit(1)
+
+# ============================================================================================
+# DESCARGA DE LA AGENDA
+# ============================================================================================
+
+def _short_error(e):
+    return str(e).split('(')[0] if '(' in str(e) else str(e)
+
+def _probe_agenda(url, today_date, cancel_event, active, headers=None, cached_html=None):
+    """
+    [v1.10] Descarga un gateway de agenda y evalúa la respuesta:
+    fecha del primer 'events-day', nº de 'event-row' y latencia.
+    [v1.12] Con petición condicional, un 304 reutiliza la agenda cacheada.
+    [v2.0] El cuerpo se lee en streaming y la respuesta queda en 'active' (como en
+    _fetch_mirror): si otro gateway ya es FRESH, se aborta la descarga.
+    """
+    # [v1.30] Sesión compartida (conexiones y reto de Cloudflare ya resuelto); la cierra close_http_sessions()
+    scraper = http_session(url, 'agenda')
+    start = time.monotonic()
+    probe = {'url': url, 'html': None, 'status': "", 'fresh': False,
+             'content_date': None, 'rows': 0, 'latency': 0.0}
+    if cancel_event.is_set(): raise DownloadCancelled()
+    try:
+        r = scraper.get(_route_url(url), timeout=(config.TIMEOUT_CONNECT, config.TIMEOUT_READ), headers=headers, stream=True)
+    except requests.RequestException as e:
+        _record_snapshot(url, None, None, None, time.monotonic() - start, error=_short_error(e))
+        raise
+    active[url] = r
+    try:
+        content = _ResponseStream(r, cancel_event).readall()
+    finally:
+        active.pop(url, None)
+        r.close()
+    probe['latency'] = time.monotonic() - start
+    _record_snapshot(url, r.status_code, r.headers, content, probe['latency'])
+    if r.status_code == 304 and headers:
+        html_content = cached_html
+    elif r.status_code != 200:
+        probe['status'] = f"ERROR: HTTP {r.status_code}"
+        return probe
+    else:
+        html_content = content.decode('utf-8', errors='replace')
+        remember_validators(get_run_cache(), url, r, sha256_text(html_content))
+    probe['html'] = html_content
+    probe['rows'] = len(RE_EVENT_ROW.findall(html_content))
+
+    # [v1.16] El extractor se detiene en el primer 'events-day'
+    first_day = first_agenda_day(html_content)
+    if not first_day:
+        probe['status'] = "WARN (No events found)"
+    elif not first_day.date:
+        probe['status'] = "WARN (Date parsing failed)"
+    else:
+        date_str = first_day.date
+        try:
+            content_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+            probe['content_date'] = content_date
+            if content_date >= today_date:
+                probe['status'] = f"FRESH (Data from {date_str})"
+                probe['fresh'] = True
+            else:
+                probe['status'] = f"STALE (Data from {date_str})"
+        except:
+            probe['status'] = "WARN (Date parsing failed)"
+    return probe
+
+def _score_agenda(probe):
+    """[v1.10] Puntuación: frescura > fecha de contenido > completitud > menor latencia."""
+    return (probe['fresh'], probe['content_date'] or datetime.date.min, probe['rows'], -probe['latency'])
+
+def get_fresh_agenda_html():
+    """
+    [v1.10] Sondea todos los gateways de config.URLS_AGENDA en paralelo.
+    La primera respuesta FRESH gana y se cancela el resto; si no hay ninguna,
+    se usa la de mejor puntuación. Todas las pruebas quedan en el log de proxies.
+    [v1.12] Peticiones condicionales contra la última agenda seleccionada (.debug/agenda.html).
+    """
+    now_utc = datetime.datetime.utcnow()
+    today_date = now_utc.date()
+    timestamp = now_utc.strftime('%Y-%m-%d %H:%M')
+
+    health = get_gateway_health()
+    urls = rank_gateways(health, config.URLS_AGENDA)
+    print(f"    [SMART FETCH] Hora UTC: {now_utc.strftime('%H:%M')}. Probando {len(urls)}/{len(config.URLS_AGENDA)} proxies en paralelo...")
+
+    results = {}
+    selected = None
+    start = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(len(urls), 1))
+    cache = get_run_cache()
+    agenda_path = Path(config.FILE_AGENDA_CACHE)
+    cached_html = agenda_path.read_bytes().decode('utf-8') if agenda_path.exists() else None
+    local_sha = sha256_text(cached_html) if cached_html else ""
+    cancel_event = threading.Event()
+    active = {}
+    futures = {executor.submit(_probe_agenda, url, today_date, cancel_event, active,
+                               conditional_headers(cache, url, local_sha), cached_html): url for url in urls}
+    count('gateways_tried', len(urls))
+
+    try:
+        for fut in as_completed(futures, timeout=config.TIMEOUT_TOTAL):
+            url = futures[fut]
+            try:
+                probe = fut.result()
+            except Exception as e:
+                probe = {'url': url, 'html': None, 'status': f"ERROR: {_short_error(e)}", 'fresh': False,
+                         'content_date': None, 'rows': 0, 'latency': time.monotonic() - start}
+            results[url] = probe
+            record_gateway_result(health, url, probe['html'] is not None, probe['latency'], probe['fresh'])
+            print(f"      -> {url} : {probe['status']} ({probe['rows']} eventos, {probe['latency']:.2f}s)")
+
+            if probe['fresh']:
+                selected = probe
+                print(f"      -> USANDO ESTE PROXY.")
+                break
+    except FuturesTimeout:
+        print(f"    [AVISO] Límite global de {config.TIMEOUT_TOTAL}s alcanzado.")
+    finally:
+        # Las pruebas que siguen descargando se abortan cortando su respuesta
+        cancel_event.set()
+        for r in list(active.values()):
+            _abort_response(r)
+        executor.shutdown(wait=False, cancel_futures=True)
+        save_gateway_health(health)
+
+    if not selected:
+        candidates = [p for p in results.values() if p['html']]
+        if candidates:
+            selected = max(candidates, key=_score_agenda)
+
+    log_entries = []
+    cancel_latency = time.monotonic() - start
+    for url in config.URLS_AGENDA:
+        probe = results.get(url)
+        if probe:
+            entry = f"[{timestamp}] {url} | {probe['status']} | {probe['latency']:.2f}s"
+            if probe is selected: entry += " [SELECTED]"
+        elif url not in urls:
+            entry = f"[{timestamp}] {url} | SKIPPED (Circuit open)"
+        else:
+            entry = f"[{timestamp}] {url} | CANCELLED | {cancel_latency:.2f}s"
+        log_entries.append(entry)
+
+    update_proxies_log(log_entries)
+
+    if selected and sha256_text(selected['html']) != local_sha:
+        Path(config.DIR_DEBUG).mkdir(exist_ok=True)
+        agenda_path.write_text(selected['html'], encoding='utf-8')
+
+    if selected and selected['fresh']:
+        return selected['html']
+    elif selected:
+        print(f"    [AVISO] No se encontraron proxies actualizados. Usando el mejor funcional ({selected['url']}).")
+        return selected['html']
+    else:
+        print("    [ERROR] Ningún proxy respondió correctamente.")
+        return None
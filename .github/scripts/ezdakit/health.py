@@ -0,0 +1,143 @@
+# ============================================================================================
+# SALUD DE GATEWAYS (EWMA + CIRCUIT BREAKER)
+# ============================================================================================
+
+import time
+import datetime
+import json
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+from . import config
+from .proxylog import RE_PROXY_LOG_LINE, iter_proxies_log
+from .util import AtomicOutput
+
+# [v1.11] Salud de gateways: suavizado EWMA y circuit breaker
+HEALTH_ALPHA = 0.3
+BREAKER_THRESHOLD = 3          # Fallos consecutivos para abrir el circuito
+BREAKER_COOLDOWN = 4 * 3600    # Segundos hasta pasar a semiabierto (un intento de prueba)
+
+_GATEWAY_HEALTH = None
+_GATEWAY_HEALTH_LOCK = threading.RLock()   # [v1.25] Listas y agenda actualizan la salud a la vez
+# [v2.0] Intentos semiabiertos en curso (host -> instante del reparto). No se persiste: un
+# intento que nadie resuelve (mirror cancelado al ganar otro) caduca a los TIMEOUT_TOTAL s.
+_GATEWAY_TRIALS = {}
+
+def _gateway_key(url):
+    return urlparse(url).netloc
+
+def _new_gateway_state():
+    return {'latency': None, 'success': 1.0, 'fresh': 1.0, 'failures': 0,
+            'opened_at': None, 'samples': 0, 'updated': None}
+
+def _apply_gateway_result(state, ok, latency, fresh, when):
+    """Actualiza las medias EWMA y el estado del circuito de un gateway."""
+    a = HEALTH_ALPHA
+    state['success'] = (1 - a) * state['success'] + a * (1.0 if ok else 0.0)
+    if fresh is not None:
+        state['fresh'] = (1 - a) * state['fresh'] + a * (1.0 if (ok and fresh) else 0.0)
+    if ok and latency is not None:
+        state['latency'] = latency if state['latency'] is None else (1 - a) * state['latency'] + a * latency
+
+    if ok:
+        state['failures'] = 0
+        state['opened_at'] = None
+    else:
+        state['failures'] += 1
+        if state['failures'] >= BREAKER_THRESHOLD:
+            # Abre (o reabre tras un intento semiabierto fallido)
+            state['opened_at'] = when
+    state['samples'] += 1
+    state['updated'] = when
+
+def _bootstrap_gateway_health():
+    """
+    Reconstruye la salud de gateways desde el historial del log de proxies.
+    [v1.28] Los segmentos ya están en orden cronológico.
+    """
+    health = {}
+    for line in iter_proxies_log():
+        m = RE_PROXY_LOG_LINE.match(line)
+        if not m: continue
+        ts_str, url, status, latency = m.groups()
+        if status not in ("FRESH", "STALE", "WARN", "OK", "ERROR"): continue
+        try:
+            when = datetime.datetime.strptime(ts_str, "%Y-%m-%d %H:%M").replace(tzinfo=datetime.timezone.utc).timestamp()
+        except ValueError:
+            continue
+        state = health.setdefault(_gateway_key(url), _new_gateway_state())
+        ok = status != "ERROR"
+        _apply_gateway_result(state, ok, float(latency) if latency else None, status == "FRESH", when)
+    return health
+
+def get_gateway_health():
+    with _GATEWAY_HEALTH_LOCK:
+        return _load_gateway_health()
+
+def _load_gateway_health():
+    global _GATEWAY_HEALTH
+    if _GATEWAY_HEALTH is not None: return _GATEWAY_HEALTH
+
+    path = Path(config.FILE_GATEWAY_HEALTH)
+    health = None
+    if path.exists():
+        try:
+            health = json.loads(path.read_text(encoding='utf-8')).get('hosts', {})
+        except (ValueError, AttributeError):
+            health = None
+    if health is None:
+        health = _bootstrap_gateway_health()
+        print(f"    [HEALTH] Salud de gateways inicializada desde {config.DIR_PROXIES_LOG}/ ({len(health)} hosts).")
+    _GATEWAY_HEALTH = health
+    return health
+
+def save_gateway_health(health):
+    """[v2.0] Solo escribe si el contenido ha cambiado."""
+    Path(config.DIR_NETWORK_STATE).mkdir(parents=True, exist_ok=True)
+    with _GATEWAY_HEALTH_LOCK:
+        content = json.dumps({'hosts': health}, indent=2, sort_keys=True)
+    with AtomicOutput(config.FILE_GATEWAY_HEALTH) as f:
+        f.write(content)
+
+def record_gateway_result(health, url, ok, latency=None, fresh=None):
+    with _GATEWAY_HEALTH_LOCK:
+        key = _gateway_key(url)
+        state = health.setdefault(key, _new_gateway_state())
+        _apply_gateway_result(state, ok, latency, fresh, time.time())
+        _GATEWAY_TRIALS.pop(key, None)
+
+def _circuit_allows(key, state, now):
+    """
+    Cerrado, o semiabierto tras el cooldown. En semiabierto solo pasa el primero que
+    reclama el intento de prueba; el resto lo salta hasta que se resuelva o caduque.
+    Llamar con _GATEWAY_HEALTH_LOCK.
+    """
+    if not state or state.get('opened_at') is None: return True
+    if now - state['opened_at'] < BREAKER_COOLDOWN: return False
+    claimed = _GATEWAY_TRIALS.get(key)
+    if claimed is not None and now - claimed < config.TIMEOUT_TOTAL: return False
+    _GATEWAY_TRIALS[key] = now
+    return True
+
+def rank_gateways(health, urls):
+    """
+    Ordena los mirrors por salud (éxito y frescura altos, latencia baja) y
+    descarta los que tienen el circuito abierto. Si todos están abiertos,
+    se prueban todos para no quedarse sin fuente.
+    """
+    now = time.time()
+    def score(url):
+        state = health.get(_gateway_key(url))
+        if not state: return (-2.0, config.TIMEOUT_READ)
+        latency = state['latency'] if state['latency'] is not None else config.TIMEOUT_READ
+        return (-(state['success'] + state['fresh']), latency)
+
+    with _GATEWAY_HEALTH_LOCK:
+        allowed = [u for u in urls if _circuit_allows(_gateway_key(u), health.get(_gateway_key(u)), now)]
+    skipped = len(urls) - len(allowed)
+    if not allowed:
+        allowed = list(urls)
+    elif skipped:
+        print(f"      [HEALTH] {skipped} mirror(s) saltados por circuito abierto.")
+    return sorted(allowed, key=score)
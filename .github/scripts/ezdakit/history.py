@@ -0,0 +1,185 @@
+# ============================================================================================
+# HISTÓRICO DE LISTAS (v1.21)
+# ============================================================================================
+# history/index.json:
+#   {"lists": {"elcano": {"head": sha,
+#                         "versions": {sha: {"base": sha|null, "depth": n}},
+#                         "runs": [[ts, sha], ...],                 solo cuando la lista cambia
+#                         "ids": {ace_id: [[desde, hasta|null], ...]}}}}
+# history/objects/ab/<sha>.json.gz: versión de una lista, completa ({"header", "blocks"})
+# o como delta sobre su base ({"base", "header", "ops"}). Una ejecución sin cambios no escribe nada.
+
+import re
+import datetime
+import shutil
+import tempfile
+import json
+import hashlib
+import gzip
+import difflib
+from pathlib import Path
+
+from . import config
+from .channels import RE_M3U_ACE_ID
+from .util import AtomicOutput
+
+def _split_m3u_blocks(text):
+    """Cabecera (todo lo anterior al primer #EXTINF) y un bloque por #EXTINF con sus líneas."""
+    header, blocks = [], []
+    for line in text.splitlines(True):
+        if line.startswith("#EXTINF"):
+            blocks.append(line)
+        elif blocks:
+            blocks[-1] += line
+        else:
+            header.append(line)
+    return "".join(header), blocks
+
+def _block_ids(blocks):
+    ids = set()
+    for block in blocks:
+        m = RE_M3U_ACE_ID.search(block)
+        if m: ids.add(m.group(1))
+    return ids
+
+def _history_object_path(sha):
+    return Path(config.DIR_HISTORY, "objects", sha[:2], f"{sha}.json.gz")
+
+def _write_history_object(sha, payload):
+    path = _history_object_path(sha)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0: el mismo contenido produce siempre el mismo fichero
+    path.write_bytes(gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), mtime=0))
+
+def load_history_index():
+    path = Path(config.FILE_HISTORY_INDEX)
+    if not path.exists(): return {'lists': {}}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+def save_history_index(index):
+    """Sustitución atómica: una ejecución interrumpida no deja un índice truncado."""
+    Path(config.DIR_HISTORY).mkdir(exist_ok=True)
+    with AtomicOutput(config.FILE_HISTORY_INDEX) as f:
+        f.write(json.dumps(index, sort_keys=True, separators=(',', ':')))
+
+def _history_blocks(history, sha, memo):
+    """Reconstruye (cabecera, bloques) de una versión recorriendo su cadena de deltas."""
+    if sha in memo: return memo[sha]
+    payload = json.loads(gzip.decompress(_history_object_path(sha).read_bytes()))
+    if payload.get('base') is None:
+        result = (payload['header'], payload['blocks'])
+    else:
+        base_header, base_blocks = _history_blocks(history, payload['base'], memo)
+        blocks, pos = [], 0
+        for op, arg in payload['ops']:
+            if op == "=":
+                blocks.extend(base_blocks[pos:pos + arg])
+                pos += arg
+            elif op == "-":
+                pos += arg
+            else:
+                blocks.extend(arg)
+        header = base_header if payload['header'] is None else payload['header']
+        result = (header, blocks)
+    memo[sha] = result
+    return result
+
+def archive_list(index, file_path, ts):
+    """
+    Añade una lista al histórico si su contenido cambió desde la última versión.
+    Devuelve (añadidos, eliminados, modificados) por ace_id, o None si no hubo cambios.
+    """
+    path = Path(file_path)
+    if not path.exists(): return None
+    name = path.stem
+    data = path.read_bytes()
+    sha = hashlib.sha256(data).hexdigest()
+    history = index['lists'].setdefault(name, {'head': None, 'versions': {}, 'runs': [], 'ids': {}})
+    if history['head'] == sha: return None
+
+    header, blocks = _split_m3u_blocks(data.decode('utf-8'))
+    if history['head']:
+        old_header, old_blocks = _history_blocks(history, history['head'], {})
+    else:
+        old_header, old_blocks = None, []
+
+    if sha not in history['versions']:
+        depth = history['versions'][history['head']]['depth'] + 1 if history['head'] else 0
+        if depth == 0 or depth >= config.HISTORY_KEYFRAME_EVERY:
+            _write_history_object(sha, {'base': None, 'header': header, 'blocks': blocks})
+            history['versions'][sha] = {'base': None, 'depth': 0}
+        else:
+            ops = []
+            matcher = difflib.SequenceMatcher(None, old_blocks, blocks, autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag == "equal":
+                    ops.append(["=", i2 - i1])
+                    continue
+                if i2 > i1: ops.append(["-", i2 - i1])
+                if j2 > j1: ops.append(["+", blocks[j1:j2]])
+            _write_history_object(sha, {'base': history['head'], 'ops': ops,
+                                        'header': None if header == old_header else header})
+            history['versions'][sha] = {'base': history['head'], 'depth': depth}
+
+    old_ids, new_ids = _block_ids(old_blocks), _block_ids(blocks)
+    changed_ids = _block_ids(set(blocks) - set(old_blocks)) & old_ids
+    for ace_id in new_ids - old_ids:
+        history['ids'].setdefault(ace_id, []).append([ts, None])
+    for ace_id in old_ids - new_ids:
+        history['ids'][ace_id][-1][1] = ts
+    history['runs'].append([ts, sha])
+    history['head'] = sha
+    return len(new_ids - old_ids), len(old_ids - new_ids), len(changed_ids)
+
+def archive_history(files, ts=None):
+    """[v1.21] Registra en el histórico las listas de esta ejecución (solo si cambiaron)."""
+    print(f"[9] Actualizando histórico ({config.DIR_HISTORY}/)...")
+    ts = ts or datetime.datetime.utcnow().strftime(config.HISTORY_TS_FORMAT)
+    index = load_history_index()
+    changed = False
+    for file_path in files:
+        delta = archive_list(index, file_path, ts)
+        if delta is None: continue
+        changed = True
+        print(f"    -> {Path(file_path).stem}: +{delta[0]} -{delta[1]} ~{delta[2]} ace_ids.")
+    if changed:
+        save_history_index(index)
+    else:
+        print("    -> Sin cambios en las listas.")
+
+def migrate_legacy_history():
+    """
+    Importa las copias completas antiguas (history/<lista>_AAAA-MM-DD_HH-MM.m3u)
+    en orden cronológico y las elimina una vez archivadas.
+    """
+    legacy = []
+    for path in Path(config.DIR_HISTORY).glob("*.m3u"):
+        m = re.match(r'(.+)_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2})$', path.stem)
+        if m: legacy.append((m.group(2), m.group(1), path))
+    if not legacy: return
+    index = load_history_index()
+    for ts, name, path in sorted(legacy):
+        tmp = Path(tempfile.mkdtemp(), f"{name}.m3u")
+        shutil.copyfile(path, tmp)
+        archive_list(index, tmp, ts)
+        shutil.rmtree(tmp.parent)
+        path.unlink()
+    save_history_index(index)
+    print(f"    -> Migradas {len(legacy)} copias completas al histórico.")
+
+def rebuild_playlist(name, when=None):
+    """Texto de la lista 'name' tal como estaba en la fecha 'when' (AAAA-MM-DD_HH-MM); la última si es None."""
+    history = load_history_index()['lists'].get(name)
+    if not history: return None
+    runs = [sha for ts, sha in history['runs'] if when is None or ts <= when]
+    if not runs: return None
+    header, blocks = _history_blocks(history, runs[-1], {})
+    return header + "".join(blocks)
+
+def lookup_ace_id(ace_id):
+    """Primera y última aparición de un ace_id en cada lista: {lista: (primera, última|None)}; None = sigue presente."""
+    result = {}
+    for name, history in load_history_index()['lists'].items():
+        spans = history['ids'].get(ace_id)
+        if spans: result[name] = (spans[0][0], spans[-1][1])
+    return result
@@ -0,0 +1,135 @@
+# ============================================================================================
+# CARGA DE DATOS ESTÁTICOS
+# ============================================================================================
+
+import re
+import csv
+import io
+from pathlib import Path
+
+from . import config
+from .util import read_file_safe
+
+def _read_blacklist(path):
+    bl = {}
+    content = read_file_safe(path)
+    reader = csv.DictReader(io.StringIO(content))
+    for row in reader:
+        aid = row.get('ace_id', '').strip()
+        real = row.get('canal_real', '').strip()
+        if aid:
+            bl[aid] = real
+    return bl
+
+def load_blacklist(log=print):
+    """Lista negra manual más la automática del sondeo (v2.1); la manual manda."""
+    log(f"[1] Cargando Lista Negra ({config.FILE_BLACKLIST})...")
+    bl = {}
+    path = Path(config.FILE_BLACKLIST)
+    if not path.exists():
+        log(f"    [AVISO] No existe {config.FILE_BLACKLIST}. Se continúa sin filtro.")
+    else:
+        bl = _read_blacklist(path)
+        log(f"    -> {len(bl)} IDs en lista negra.")
+
+    auto_path = Path(config.FILE_AUTO_BLACKLIST)
+    if auto_path.exists():
+        auto = {aid: real for aid, real in _read_blacklist(auto_path).items() if aid not in bl}
+        bl.update(auto)
+        log(f"    -> {len(auto)} IDs añadidos desde {config.FILE_AUTO_BLACKLIST}.")
+    return bl
+
+def load_forced_channels(log=print):
+    log(f"[1.1] Cargando Canales Forzados ({config.FILE_FORZADOS})...")
+    forced = {}
+    path = Path(config.FILE_FORZADOS)
+    if not path.exists():
+        log(f"    [AVISO] No existe {config.FILE_FORZADOS}. Se continúa sin canales forzados.")
+        return forced
+    
+    content = read_file_safe(path)
+    content = content.replace('\ufeff', '')
+    
+    reader = csv.DictReader(io.StringIO(content))
+    for row in reader:
+        aid = row.get('acestream_id', '').strip()
+        if aid:
+            forced[aid] = {
+                'tvg': row.get('tvg-id', '').strip(),
+                'name': row.get('nombre_supuesto', '').strip(),
+                'group': row.get('grupo', '').strip(),
+                'quality': row.get('calidad', '').strip()
+            }
+    log(f"    -> {len(forced)} canales forzados cargados.")
+    return forced
+
+def load_agenda_rules(log=print):
+    """
+    [v1.15] Carga reglas_agenda.csv y compila las reglas 'literal'/'regex' en una única
+    alternancia (se aplican de izquierda a derecha en una pasada; a igual posición gana
+    la regla que aparece antes en el CSV). Las reglas 'exacta' se aplican al final
+    sobre el texto completo ya normalizado. El reemplazo es siempre texto literal.
+    """
+    log(f"[2.1] Cargando Reglas de Agenda ({config.FILE_REGLAS_AGENDA})...")
+    engine = {'rules': [], 'pattern': None, 'exact': {}, 'hits': [], 'lookups': 0, 'memo': {}}
+    path = Path(config.FILE_REGLAS_AGENDA)
+    if not path.exists():
+        log(f"    [AVISO] No existe {config.FILE_REGLAS_AGENDA}. Se continúa sin reglas de normalización.")
+        return engine
+
+    content = read_file_safe(path).replace('\ufeff', '')
+    alternatives = []
+    for row in csv.DictReader(io.StringIO(content)):
+        kind = row.get('tipo', '').strip().lower()
+        pattern = row.get('patron', '')
+        if not kind or not pattern: continue
+        idx = len(engine['rules'])
+        engine['rules'].append({'tipo': kind, 'patron': pattern,
+                                'reemplazo': row.get('reemplazo', ''),
+                                'descripcion': row.get('descripcion', '').strip()})
+        if kind == 'exacta':
+            engine['exact'].setdefault(pattern.strip(), idx)
+        elif kind == 'literal':
+            alternatives.append(f"(?P<r{idx}>{re.escape(pattern)})")
+        elif kind == 'regex':
+            alternatives.append(f"(?P<r{idx}>{pattern})")
+        else:
+            log(f"    [AVISO] Tipo de regla desconocido '{kind}' ({pattern}). Se ignora.")
+
+    engine['hits'] = [0] * len(engine['rules'])
+    if alternatives:
+        engine['pattern'] = re.compile('|'.join(alternatives))
+    log(f"    -> {len(engine['rules'])} reglas cargadas.")
+    return engine
+
+def load_channel_maps(log=print):
+    """
+    [v1.7] Carga listado_canales.csv y genera dos mapas:
+    1. dial_map: Para validación de existencia (aunque se usa menos ahora).
+    2. name_map: Para vincular 'canal_agenda' -> 'tvg-id'.
+    """
+    log(f"[2] Cargando Mapas de Canales ({config.FILE_DIAL_MAP})...")
+    dial_map = {} 
+    name_map = {} # Nuevo mapa por NOMBRE
+    
+    path = Path(config.FILE_DIAL_MAP)
+    if not path.exists():
+        log(f"    [ERROR] No existe {config.FILE_DIAL_MAP}. El scraping fallará.")
+        return dial_map, name_map
+        
+    content = read_file_safe(path)
+    reader = csv.DictReader(io.StringIO(content))
+    for row in reader:
+        dial = row.get('Dial_Movistar(M)', '').strip()
+        tvg = row.get('TV_guide_id', '').strip()
+        name = row.get('Canal', '').strip()
+        
+        if dial and tvg:
+            dial_map[dial] = {'tvg': tvg, 'name': name}
+        
+        if name and tvg:
+            # Clave en mayúsculas para coincidir con canal_agenda
+            name_map[name.upper()] = tvg
+            
+    log(f"    -> {len(dial_map)} diales y {len(name_map)} nombres mapeados.")
+    return dial_map, name_map
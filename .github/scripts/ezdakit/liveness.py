@@ -0,0 +1,200 @@
+# ============================================================================================
+# SONDEO DE ACESTREAMS (v2.1)
+# ============================================================================================
+# Comprueba cada ace_id de la lista maestra contra la API HTTP del motor AceStream:
+#   1. /ace/getstream?id=...&format=json abre una sesión y devuelve stat_url y command_url.
+#   2. stat_url se consulta hasta que el stream descarga o tiene peers (vivo), el motor
+#      informa de un error (muerto) o se agota PROBE_TIMEOUT (muerto, "sin peers").
+#   3. command_url?method=stop cierra la sesión.
+# Los sondeos van en paralelo (PROBE_CONCURRENCY) y los resultados se guardan con TTL en
+# .debug/liveness.json: los IDs comprobados hace poco no se vuelven a sondear. Un ID con
+# PROBE_DEAD_STRIKES fallos seguidos pasa a canales/lista_negra_auto.csv, que load_blacklist
+# fusiona con la manual. Si el motor no responde no se toca nada.
+
+import csv
+import json
+import time
+import datetime
+import requests
+from collections import namedtuple
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .metrics import count
+from .util import AtomicOutput
+
+PROBE_CONCURRENCY = 32
+PROBE_TIMEOUT = 8            # Segundos por ace_id (apertura + espera de peers)
+PROBE_POLL = 0.5             # Intervalo de consulta de stat_url
+PROBE_TTL_ALIVE = 6 * 3600   # Un ID vivo no se vuelve a sondear en 6 h
+PROBE_TTL_DEAD = 3600        # Uno muerto se reintenta antes, por si vuelve
+PROBE_DEAD_STRIKES = 2       # Fallos seguidos para entrar en la lista negra automática
+PROBE_RETENTION_DAYS = 7     # IDs que ya no están en ninguna lista se olvidan tras N días
+
+# alive: True/False, o None si el fallo fue del motor (no cuenta contra el stream)
+ProbeResult = namedtuple('ProbeResult', ['ace_id', 'alive', 'reason', 'latency'])
+
+class EngineUnavailable(Exception):
+    pass
+
+def _engine_json(session, url, timeout, params=None):
+    try:
+        resp = session.get(url, params=params, timeout=timeout)
+    except requests.exceptions.Timeout:
+        raise   # El stream no respondió a tiempo; lo resuelve probe_ace_id
+    except requests.exceptions.RequestException as e:
+        raise EngineUnavailable(str(e))
+    if resp.status_code != 200:
+        return None, f"HTTP {resp.status_code}"
+    try:
+        data = resp.json()
+    except ValueError:
+        return None, "respuesta no JSON"
+    if data.get('error'):
+        return None, str(data['error'])
+    return data.get('response') or {}, None
+
+def probe_ace_id(session, engine, ace_id, timeout=PROBE_TIMEOUT):
+    """Sondea un ace_id. Nunca lanza: los fallos del motor vuelven como alive=None."""
+    start = time.monotonic()
+    deadline = start + timeout
+    command_url = None
+    try:
+        stream, error = _engine_json(session, f"{engine}/ace/getstream", timeout,
+                                     params={'id': ace_id, 'format': 'json', 'pid': f"ezdakit-{ace_id}"})
+        if error:
+            return ProbeResult(ace_id, False, error, time.monotonic() - start)
+        stat_url, command_url = stream.get('stat_url'), stream.get('command_url')
+        if not stat_url:
+            return ProbeResult(ace_id, False, "sin stat_url", time.monotonic() - start)
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            stat, error = _engine_json(session, stat_url, remaining)
+            if error or stat.get('status') == 'err':
+                return ProbeResult(ace_id, False, error or "estado err", time.monotonic() - start)
+            if stat.get('status') == 'dl' or (stat.get('peers') or 0) > 0:
+                return ProbeResult(ace_id, True, "", time.monotonic() - start)
+            time.sleep(min(PROBE_POLL, max(0.0, deadline - time.monotonic())))
+        return ProbeResult(ace_id, False, "sin peers", timeout)
+    except requests.exceptions.Timeout:
+        return ProbeResult(ace_id, False, "timeout", timeout)
+    except EngineUnavailable as e:
+        return ProbeResult(ace_id, None, f"motor: {e}", time.monotonic() - start)
+    finally:
+        if command_url:
+            try:
+                session.get(command_url, params={'method': 'stop'}, timeout=2)
+            except requests.exceptions.RequestException:
+                pass
+
+def engine_available(session, engine):
+    try:
+        return session.get(f"{engine}/webui/api/service", params={'method': 'get_version'},
+                           timeout=config.TIMEOUT_CONNECT).status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+def probe_ace_ids(ace_ids, engine=None, concurrency=PROBE_CONCURRENCY, timeout=PROBE_TIMEOUT):
+    """Sondea ace_ids en paralelo. Devuelve la lista de ProbeResult (lanza EngineUnavailable si no hay motor)."""
+    engine = (engine or config.ENGINE_URL).rstrip("/")
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not engine_available(session, engine):
+            raise EngineUnavailable(f"{engine} no responde")
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(lambda aid: probe_ace_id(session, engine, aid, timeout), ace_ids))
+
+# ============================================================================================
+# CACHÉ DE RESULTADOS Y LISTA NEGRA AUTOMÁTICA
+# ============================================================================================
+
+def load_liveness_cache():
+    path = Path(config.FILE_LIVENESS_CACHE)
+    if path.exists():
+        try:
+            return json.loads(path.read_text(encoding='utf-8')).get('ids', {})
+        except (ValueError, AttributeError):
+            pass
+    return {}
+
+def save_liveness_cache(cache):
+    Path(config.DIR_DEBUG).mkdir(exist_ok=True)
+    content = json.dumps({'ids': cache}, indent=1, sort_keys=True)
+    Path(config.FILE_LIVENESS_CACHE).write_text(content, encoding='utf-8')
+
+def _is_fresh(state, now):
+    ttl = PROBE_TTL_ALIVE if state['alive'] else PROBE_TTL_DEAD
+    return now - state['checked'] < ttl
+
+def apply_probe_results(cache, results, now):
+    for r in results:
+        if r.alive is None: continue
+        prev = cache.get(r.ace_id, {})
+        failures = 0 if r.alive else prev.get('failures', 0) + 1
+        # since: desde cuándo está en su estado actual (fecha que figura en la lista negra automática)
+        since = prev.get('since') if prev.get('alive') == r.alive else None
+        cache[r.ace_id] = {'alive': r.alive, 'checked': now, 'failures': failures, 'reason': r.reason,
+                           'latency': round(r.latency, 2),
+                           'since': since or datetime.datetime.utcfromtimestamp(now).strftime('%Y-%m-%d %H:%M')}
+
+def expire_liveness_cache(cache, keep_ids, now):
+    limit = now - PROBE_RETENTION_DAYS * 86400
+    for aid in [aid for aid, state in cache.items() if aid not in keep_ids and state['checked'] < limit]:
+        del cache[aid]
+
+def write_auto_blacklist(cache, master_db):
+    """Escribe canales/lista_negra_auto.csv con los IDs de la lista maestra que siguen muertos."""
+    names = {ch.ace_id: ch.nombre_supuesto for ch in master_db}
+    dead = sorted(aid for aid, state in cache.items()
+                  if aid in names and not state['alive'] and state['failures'] >= PROBE_DEAD_STRIKES)
+    if not dead and not Path(config.FILE_AUTO_BLACKLIST).exists(): return dead, False
+    out = AtomicOutput(config.FILE_AUTO_BLACKLIST, encoding='utf-8', newline='')   # Entrada como lista_negra.csv: sin BOM
+    with out as f:
+        w = csv.DictWriter(f, fieldnames=['ace_id', 'canal_real', 'nombre_supuesto', 'motivo', 'desde'])
+        w.writeheader()
+        for aid in dead:
+            state = cache[aid]
+            # canal_real vacío: la entrada se marca como BLACKLIST igual que las manuales sin nombre
+            w.writerow({'ace_id': aid, 'canal_real': '', 'nombre_supuesto': names[aid],
+                        'motivo': state['reason'], 'desde': state['since']})
+    return dead, out.changed
+
+def update_auto_blacklist(master_db, engine=None, concurrency=PROBE_CONCURRENCY, timeout=PROBE_TIMEOUT):
+    """
+    Sondea los ace_id de master_db sin resultado vigente en la caché y regenera la lista negra
+    automática. Devuelve True si cambió (hay que regenerar las salidas).
+    """
+    ace_ids = list(dict.fromkeys(ch.ace_id for ch in master_db))
+    cache = load_liveness_cache()
+    now = time.time()
+    pending = [aid for aid in ace_ids if aid not in cache or not _is_fresh(cache[aid], now)]
+    print(f"[P] Sondeando {len(pending)} de {len(ace_ids)} acestreams "
+          f"({len(ace_ids) - len(pending)} con resultado reciente; {concurrency} en paralelo)...")
+    count('probes_cached', len(ace_ids) - len(pending))
+
+    if pending:
+        start = time.monotonic()
+        try:
+            results = probe_ace_ids(pending, engine, concurrency, timeout)
+        except EngineUnavailable as e:
+            print(f"    [AVISO] Motor AceStream no disponible ({e}). Se mantiene {config.FILE_AUTO_BLACKLIST}.")
+            return False
+        apply_probe_results(cache, results, now)
+        alive = sum(1 for r in results if r.alive)
+        dead = sum(1 for r in results if r.alive is False)
+        unknown = len(results) - alive - dead
+        count('probes_run', len(results))
+        print(f"    -> {alive} vivos, {dead} muertos" + (f", {unknown} sin respuesta del motor" if unknown else "") +
+              f" en {time.monotonic() - start:.1f}s.")
+
+    expire_liveness_cache(cache, set(ace_ids), now)
+    save_liveness_cache(cache)
+    dead_ids, changed = write_auto_blacklist(cache, master_db)
+    if changed: print(f"    -> {config.FILE_AUTO_BLACKLIST}: {len(dead_ids)} IDs (actualizada).")
+    else: print(f"    -> {config.FILE_AUTO_BLACKLIST}: {len(dead_ids)} IDs (sin cambios).")
+    return changed
@@ -0,0 +1,228 @@
+# ============================================================================================
+# MÉTRICAS DE EJECUCIÓN (v1.18)
+# ============================================================================================
+# [v2.0] tracemalloc, cProfile y pstats solo se importan con --tracemalloc / --profile.
+
+import os
+import time
+import datetime
+import json
+import threading
+import contextlib
+from pathlib import Path
+
+from . import config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUN_METRICS = {'stages': [], 'counters': {}}
+_METRICS_LOCK = threading.Lock()
+_RUN_START = time.monotonic()
+_RUN_CPU_START = time.process_time()
+
+def count(name, amount=1):
+    """Incrementa un contador de la ejecución (seguro entre hilos)."""
+    with _METRICS_LOCK:
+        RUN_METRICS['counters'][name] = RUN_METRICS['counters'].get(name, 0) + amount
+
+def reset_run_metrics():
+    """[v1.30] En modo demonio cada ciclo tiene su propio informe."""
+    global _RUN_START, _RUN_CPU_START
+    with _METRICS_LOCK:
+        RUN_METRICS['stages'].clear()
+        RUN_METRICS['counters'].clear()
+    _RUN_START = time.monotonic()
+    _RUN_CPU_START = time.process_time()
+
+def run_elapsed():
+    """Segundos desde el inicio de la ejecución (o del ciclo, en modo demonio)."""
+    return time.monotonic() - _RUN_START
+
+def _peak_rss_mb():
+    if resource is None: return None
+    # ru_maxrss va en KB en Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+@contextlib.contextmanager
+def stage_span(name):
+    """
+    Mide una etapa: tiempo de pared, CPU, pico de RSS del proceso al terminar y,
+    con --tracemalloc, pico de memoria Python dentro de la etapa. Con --profile
+    la etapa se perfila además con cProfile (ver save_stage_profile).
+    [v1.25] La CPU es la del hilo de la etapa: con etapas en paralelo, process_time
+    sumaría el trabajo de las demás.
+    """
+    if config.TRACE_MEMORY:
+        import tracemalloc
+        if not tracemalloc.is_tracing(): tracemalloc.start()
+        tracemalloc.reset_peak()
+    profiler = None
+    if config.PROFILE_MODE:
+        import cProfile
+        profiler = cProfile.Profile()
+    start_wall = time.monotonic()
+    start_cpu = time.thread_time()
+    if profiler: profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            save_stage_profile(name, profiler)
+        span = {
+            'stage': name,
+            'start_s': round(start_wall - _RUN_START, 3),
+            'wall_s': round(time.monotonic() - start_wall, 3),
+            'cpu_s': round(time.thread_time() - start_cpu, 3),
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+        if config.TRACE_MEMORY:
+            span['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / 1048576, 2)
+        RUN_METRICS['stages'].append(span)
+
+def write_run_report():
+    """
+    Guarda el informe de la ejecución en .debug/last_run.json y lo añade a
+    .debug/metrics.jsonl, descartando entradas de más de config.METRICS_RETENTION_DAYS días.
+    Es la única escritura que hace siempre una ejecución sin cambios: el informe es por
+    ejecución y metrics.jsonl se versiona para conservar la serie entre ejecuciones del workflow.
+    """
+    now = datetime.datetime.utcnow()
+    report = {
+        'timestamp': now.strftime('%Y-%m-%d %H:%M'),
+        'mode': "testing" if config.TEST_MODE else "produccion",
+        'total_wall_s': round(time.monotonic() - _RUN_START, 3),
+        'total_cpu_s': round(time.process_time() - _RUN_CPU_START, 3),
+        'peak_rss_mb': _peak_rss_mb(),
+        'stages': RUN_METRICS['stages'],
+        'counters': dict(sorted(RUN_METRICS['counters'].items())),
+    }
+    Path(config.DIR_DEBUG).mkdir(exist_ok=True)
+    Path(config.FILE_LAST_RUN).write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    cutoff = (now - datetime.timedelta(days=config.METRICS_RETENTION_DAYS)).strftime('%Y-%m-%d %H:%M')
+    kept = []
+    path = Path(config.FILE_METRICS)
+    if path.exists():
+        for line in path.read_text(encoding='utf-8').splitlines():
+            try:
+                if json.loads(line).get('timestamp', '') >= cutoff:
+                    kept.append(line)
+            except ValueError:
+                continue
+    kept.append(json.dumps(report, separators=(',', ':')))
+    path.write_text("\n".join(kept) + "\n", encoding='utf-8')
+
+    print(f"    [METRICAS] {report['total_wall_s']:.1f}s total, pico RSS {report['peak_rss_mb']} MB.")
+    for span in report['stages']:
+        print(f"      {span['stage']:<22} {span['wall_s']:8.2f}s pared {span['cpu_s']:8.2f}s CPU")
+
+# ============================================================================================
+# PERFILADO (v1.19)
+# ============================================================================================
+
+_PROFILE_STATS = []   # (etapa, pstats.Stats) en orden de ejecución
+
+def _func_label(func):
+    filename, line, name = func
+    if filename == '~': return name  # built-ins: "<method 'sub' of 're.Pattern' objects>"
+    return f"{os.path.basename(filename)}:{line}:{name}"
+
+def collapsed_stacks(stats, root_label, min_us=1):
+    """
+    Convierte un pstats.Stats en pilas colapsadas ("a;b;c <microsegundos>"),
+    el formato de entrada de flamegraph.pl y speedscope.
+    cProfile sólo guarda aristas llamante->llamado, así que el tiempo de cada
+    función se reparte entre sus caminos en proporción al tiempo acumulado de
+    cada arista; el resultado es una aproximación, no un muestreo real.
+    """
+    raw = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+    roots = [f for f, (_, _, _, _, callers) in raw.items() if not callers]
+
+    totals = {}
+    def walk(func, path, scale):
+        _, _, tt, ct, _ = raw[func]
+        path = path + (_func_label(func),)
+        own = int(tt * scale * 1e6)
+        if own >= min_us:
+            key = ";".join(path)
+            totals[key] = totals.get(key, 0) + own
+        if len(path) > 64: return
+        for callee in callees.get(func, ()):
+            if _func_label(callee) in path: continue  # recursión
+            callee_ct = raw[callee][3]
+            edge_ct = raw[callee][4][func][3]
+            if callee_ct <= 0 or edge_ct * scale * 1e6 < min_us: continue
+            walk(callee, path, scale * edge_ct / callee_ct)
+
+    for root in roots:
+        walk(root, (root_label,), 1.0)
+    return [f"{k} {v}" for k, v in sorted(totals.items())]
+
+def save_stage_profile(name, profiler):
+    """Guarda .debug/profile/<etapa>.pstats y <etapa>.collapsed."""
+    import pstats
+    Path(config.DIR_PROFILE).mkdir(parents=True, exist_ok=True)
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(os.path.join(config.DIR_PROFILE, f"{name}.pstats"))
+    lines = collapsed_stacks(stats, name)
+    Path(config.DIR_PROFILE, f"{name}.collapsed").write_text("\n".join(lines) + "\n", encoding='utf-8')
+    _PROFILE_STATS.append((name, stats))
+
+# [v1.19] Categorías del resumen: (etiqueta, módulos por ruta de fichero, marcas en built-ins)
+PROFILE_BUCKETS = [
+    ('regex', ('/re.py', '/re/', '/sre_'), ("'re.", "_sre.")),
+    ('html.parser', ('/html/parser.py', '/_markupbase.py', '/html/__init__.py'), ()),
+    ('red/espera', ('/socket.py', '/ssl.py', '/selectors.py', '/http/client.py', '/threading.py',
+                    '/concurrent/futures/', '/urllib3/', '/requests/', '/cloudscraper/'),
+     ('_socket.', '_ssl.', 'select.', "'_thread.", 'time.sleep')),
+]
+
+def profile_bucket(func):
+    """Categoría de una entrada de pstats (por su fichero o, en built-ins, por su nombre)."""
+    filename, _, name = func
+    for label, paths, builtins in PROFILE_BUCKETS:
+        if filename == '~':
+            if any(mark in name for mark in builtins): return label
+        elif any(part in filename.replace(os.sep, '/') for part in paths):
+            return label
+    return 'resto'
+
+def report_profile(top_n=config.PROFILE_TOP_N):
+    """
+    Resumen final: las top_n funciones con más tiempo propio sumando todas las etapas, y
+    el tiempo propio agrupado por categoría (PROFILE_BUCKETS).
+    El trabajo de red ocurre en hilos que cProfile no ve; en el hilo principal
+    aparece como espera (acquire/as_completed).
+    """
+    if not _PROFILE_STATS: return
+    print(f"\n[PERFIL] Top {top_n} funciones por tiempo propio (ficheros en {config.DIR_PROFILE}/)")
+    combined = {}
+    for stage, stats in _PROFILE_STATS:
+        for func, (_, nc, tt, ct, _) in stats.stats.items():
+            entry = combined.setdefault(func, [0, 0.0, 0.0, set()])
+            entry[0] += nc
+            entry[1] += tt
+            entry[2] += ct
+            entry[3].add(stage)
+    ranked = sorted(combined.items(), key=lambda kv: kv[1][1], reverse=True)[:top_n]
+    print(f"    {'propio':>9} {'acum.':>9} {'llamadas':>10}  función [etapas]")
+    for func, (nc, tt, ct, stages) in ranked:
+        print(f"    {tt:8.3f}s {ct:8.3f}s {nc:10d}  {_func_label(func)} [{','.join(sorted(stages))}]")
+
+    # Tiempo propio por categoría: expresiones regulares, html.parser y red/esperas
+    buckets = {label: 0.0 for label, _, _ in PROFILE_BUCKETS}
+    buckets['resto'] = 0.0
+    for func, (_, tt, _, _) in combined.items():
+        buckets[profile_bucket(func)] += tt
+    total = sum(buckets.values()) or 1.0
+    print(f"[PERFIL] Tiempo propio por categoría:")
+    for label, tt in buckets.items():
+        print(f"    {label:<12} {tt:8.3f}s {100 * tt / total:5.1f}%")
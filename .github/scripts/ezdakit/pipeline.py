@@ -0,0 +1,290 @@
+# ============================================================================================
+# PIPELINE
+# ============================================================================================
+# [v2.0] Los módulos pesados se importan dentro de las etapas que los usan: fetch (requests,
+# cloudscraper) solo si hay descargas, store (sqlite3) con --sqlite, replay y server
+# (http.server) solo en esos modos. Así "render" no toca la red ni carga sus dependencias.
+
+import sys
+import time
+import datetime
+import threading
+from pathlib import Path
+
+from . import config
+from .agenda import generate_descartes_csv, generate_eventos_files, iter_event_rows, scrape_and_match
+from .cache import file_sha, get_run_cache, save_run_cache, sha256_text, stage_key, stage_unchanged
+from .channels import build_master_channel_list, generate_correspondencias, generate_ezdakit_m3u
+from .history import archive_history, migrate_legacy_history
+from .inputs import load_agenda_rules, load_blacklist, load_channel_maps
+from .metrics import count, report_profile, reset_run_metrics, write_run_report
+from .scheduler import Stage, run_stage_graph
+from .util import files_version
+
+# Etapas finales de cada objetivo; run_cycle ejecuta además todas sus dependencias
+TARGET_STAGES = {
+    'channels': ('write_channels', 'archive_history'),
+    'events': ('write_events',),
+}
+
+def input_files():
+    return [config.FILE_BLACKLIST, config.FILE_AUTO_BLACKLIST, config.FILE_DIAL_MAP, config.FILE_REGLAS_AGENDA]
+
+def open_run_context():
+    """
+    [v1.30] Estado que se conserva entre ciclos en modo demonio: caché de ejecución,
+    almacén SQLite, CSV de entrada ya cargados y la última agenda.
+    """
+    store = None
+    if config.USE_STORE:
+        # [v1.22] Con --sqlite, si las listas no cambiaron se lee master_db del almacén sin re-parsear
+        from .store import open_store
+        store = open_store()
+    return {'cache': get_run_cache(), 'store': store,
+            'inputs': None, 'inputs_version': None, 'agenda_html': None}
+
+def close_run_context(ctx):
+    if ctx['store']: ctx['store'].close()
+    fetch = sys.modules.get(f"{__package__}.fetch")   # Solo si alguna etapa llegó a descargar
+    if fetch: fetch.close_http_sessions()
+
+def select_stages(stages, targets):
+    """Etapas necesarias para los objetivos pedidos (sus etapas finales y todas sus dependencias)."""
+    by_name = {st.name: st for st in stages}
+    wanted = set()
+    pending = [name for target in targets for name in TARGET_STAGES[target]]
+    while pending:
+        name = pending.pop()
+        if name in wanted: continue
+        wanted.add(name)
+        pending.extend(by_name[name].deps)
+    return [st for st in stages if st.name in wanted]
+
+def run_cycle(ctx, lists_due=True, agenda_due=True, targets=tuple(TARGET_STAGES)):
+    """
+    Una pasada del pipeline. [v1.30] En modo demonio, las fuentes que no tocan en
+    este ciclo no se descargan: se usan las copias locales (listas) o la última agenda.
+    [v2.0] targets limita las etapas a las de 'channels' y/o 'events' (subórdenes de la CLI).
+    """
+    cache, store = ctx['cache'], ctx['store']
+    if store:
+        from .store import query_channels, query_discards, query_events, store_meta, sync_channels, sync_events
+    run_ts = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M')
+    channels_outputs = [config.FILE_CORRESPONDENCIAS, config.FILE_EZDAKIT]
+    events_outputs = [config.FILE_EVENTOS_CSV, config.FILE_EVENTOS_M3U, config.FILE_DESCARTES]
+
+    # [v1.25] Etapas como grafo de dependencias: listas, agenda y CSV de entrada en paralelo
+    def load_inputs(r):
+        version = files_version(input_files())
+        if ctx['inputs'] is not None and version == ctx['inputs_version']:
+            print(f"[0] CSV de entrada sin cambios (en memoria).")
+            return ctx['inputs']
+        # [v1.7] Carga doble mapa (dial y nombre)
+        dial_map, name_map = load_channel_maps()
+        ctx['inputs'] = {'blacklist': load_blacklist(), 'dial_map': dial_map, 'name_map': name_map,
+                         'rules': load_agenda_rules()}
+        ctx['inputs_version'] = version
+        return ctx['inputs']
+
+    def download_lists(r):
+        if lists_due:
+            from .fetch import download_channel_lists
+            download_channel_lists()
+        else:
+            print(f"[1-2] Listas fuera de turno: se usan las copias locales.")
+        # [v1.12] Las etapas se saltan si sus entradas no han cambiado
+        key = stage_key(*(file_sha(src.file) for src in config.CHANNEL_SOURCES),
+                        file_sha(config.FILE_BLACKLIST), file_sha(config.FILE_AUTO_BLACKLIST),
+                        file_sha(config.FILE_FORZADOS))
+        return {'key': key, 'skip': stage_unchanged(cache, 'channels', key, channels_outputs)}
+
+    def fetch_agenda(r):
+        if not agenda_due:
+            if ctx['agenda_html'] is None:
+                agenda_path = Path(config.FILE_AGENDA_CACHE)
+                ctx['agenda_html'] = agenda_path.read_bytes().decode('utf-8') if agenda_path.exists() else None
+            print(f"[6.0] Agenda fuera de turno: se reutiliza la última.")
+            return ctx['agenda_html']
+        from .fetch import get_fresh_agenda_html
+        print(f"[6.0] Descargando agenda...")
+        ctx['agenda_html'] = get_fresh_agenda_html()
+        return ctx['agenda_html']
+
+    def unchanged_master_list(r):
+        """Lista maestra cuando las listas no cambiaron: del almacén si está al día, si no se reconstruye."""
+        if store and store_meta(store, 'channels_key') == r['download_lists']['key']:
+            master_db = query_channels(store)
+            print(f"[3.1] {len(master_db)} canales leídos de {config.FILE_STORE}.")
+            return master_db
+        return build_master_channel_list(r['load_inputs']['blacklist'])
+
+    def master_list(r):
+        # Con las listas sin cambios solo hace falta si cambia la agenda (se construye en match_events)
+        if r['download_lists']['skip']: return None
+        return build_master_channel_list(r['load_inputs']['blacklist'])
+
+    def store_channels(r):
+        """Con --sqlite, sincroniza master_db en el almacén. Devuelve True si cambió alguna fila."""
+        lists = r['download_lists']
+        if lists['skip']: return False
+        delta = sync_channels(store, r['build_master'], run_ts)
+        print(f"    [SQLITE] Canales: +{delta[0]} -{delta[1]} ~{delta[2]}.")
+        store_meta(store, 'channels_key', lists['key'])
+        store.commit()
+        return any(delta)
+
+    def write_channels(r):
+        lists, master_db = r['download_lists'], r['build_master']
+        if lists['skip']:
+            print(f"[4-5] Listas sin cambios en origen. Se omite la regeneración de {', '.join(channels_outputs)}.")
+            count('stages_skipped')
+            return
+        rows_changed = True
+        if store:
+            rows_changed = r['store_channels'] or not all(Path(o).exists() for o in channels_outputs)
+            # Las salidas se generan desde el almacén (SELECT ... ORDER BY), como las de eventos
+            if rows_changed: master_db = query_channels(store)
+        if rows_changed:
+            generate_correspondencias(master_db)
+            generate_ezdakit_m3u(master_db)
+        else:
+            print(f"[4-5] Sin cambios en las filas de canales. Se mantienen {', '.join(channels_outputs)}.")
+        cache['stages']['channels'] = lists['key']
+
+    def match_events(r):
+        inputs, html = r['load_inputs'], r['fetch_agenda']
+        key = stage_key(r['download_lists']['key'], file_sha(config.FILE_DIAL_MAP), file_sha(config.FILE_REGLAS_AGENDA),
+                        sha256_text(html or ""))
+        if stage_unchanged(cache, 'events', key, events_outputs):
+            print(f"[6-8] Agenda sin cambios en origen. Se omite la regeneración de {', '.join(events_outputs)}.")
+            count('stages_skipped')
+            return None
+        # [v1.7] Pasamos name_map al scraping
+        master_db = r['build_master']
+        if master_db is None: master_db = unchanged_master_list(r)
+        events_list, discarded_list = scrape_and_match(inputs['dial_map'], inputs['name_map'], master_db,
+                                                       html, inputs['rules'])
+        return {'key': key, 'events': events_list, 'discarded': discarded_list}
+
+    def write_events(r):
+        matched = r['match_events']
+        if matched is None: return
+        rows_changed = True
+        event_rows, discarded_list = iter_event_rows(matched['events']), matched['discarded']
+        if store:
+            rows_changed = sync_events(store, event_rows, discarded_list, run_ts) or \
+                           not all(Path(o).exists() for o in events_outputs)
+            event_rows, discarded_list = query_events(store), query_discards(store)
+        if rows_changed:
+            generate_eventos_files(event_rows)
+            generate_descartes_csv(discarded_list)
+        else:
+            print(f"[7-8] Sin cambios en las filas de eventos. Se mantienen {', '.join(events_outputs)}.")
+        cache['stages']['events'] = matched['key']
+
+    def archive(r):
+        migrate_legacy_history()
+        archive_history([src.file for src in config.CHANNEL_SOURCES] + [config.FILE_EZDAKIT])
+
+    # Con --sqlite, la conexión es única: las escrituras de canales y eventos no se solapan. Los
+    # eventos esperan a la sincronización de canales (si esta ejecución la hace), no a sus ficheros.
+    sync_deps = ('store_channels',) if store else ()
+    stages = [
+        Stage('load_inputs', load_inputs, ()),
+        Stage('download_lists', download_lists, ()),
+        Stage('fetch_agenda', fetch_agenda, ()),
+        Stage('build_master', master_list, ('load_inputs', 'download_lists')),
+        Stage('store_channels', store_channels, ('download_lists', 'build_master')),
+        Stage('write_channels', write_channels, ('download_lists', 'build_master') + sync_deps),
+        Stage('match_events', match_events, ('load_inputs', 'download_lists', 'build_master', 'fetch_agenda')),
+        Stage('write_events', write_events, ('match_events',) + (sync_deps if 'channels' in targets else ())),
+        Stage('archive_history', archive, ('download_lists', 'write_channels')),
+    ]
+    if not store: stages = [st for st in stages if st.name != 'store_channels']
+    run_stage_graph(select_stages(stages, targets), sequential=config.SEQUENTIAL)
+    save_run_cache(cache)
+
+def prepare_network(lists_due, agenda_due):
+    """Servidor de reproducción y salud de gateways, solo si el ciclo va a descargar algo."""
+    if not (lists_due or agenda_due): return
+    if config.REPLAY_DIR:
+        from .replay import start_replay_server
+        start_replay_server(config.REPLAY_DIR)
+    from .health import get_gateway_health
+    get_gateway_health()   # Carga (o inicializa) la salud antes de lanzar descargas en paralelo
+
+def run_once(targets=tuple(TARGET_STAGES), lists_due=True, agenda_due=True):
+    """Una ejecución completa o parcial (subórdenes all, channels, events y render)."""
+    Path(config.DIR_CANALES).mkdir(exist_ok=True)
+    prepare_network(lists_due, agenda_due)
+    ctx = open_run_context()
+    try:
+        run_cycle(ctx, lists_due, agenda_due, targets)
+    finally:
+        close_run_context(ctx)
+
+    write_run_report()
+    report_profile()
+
+    print("\n######################################################################")
+    print("### PROCESO COMPLETADO")
+    print("######################################################################")
+
+def run_probe(engine=None, concurrency=None, timeout=None):
+    """
+    [v2.1] Orden probe: sondea los acestreams de la lista maestra (copias locales) y, si
+    cambia la lista negra automática, regenera las salidas sin red como 'render'.
+    """
+    from .liveness import PROBE_CONCURRENCY, PROBE_TIMEOUT, update_auto_blacklist
+    Path(config.DIR_CANALES).mkdir(exist_ok=True)
+    master_db = build_master_channel_list(load_blacklist())
+    changed = update_auto_blacklist(master_db, engine, concurrency or PROBE_CONCURRENCY, timeout or PROBE_TIMEOUT)
+    if changed:
+        print()
+        run_once(lists_due=False, agenda_due=False)
+    else:
+        write_run_report()
+        print("\n[P] Lista negra automática sin cambios: no hace falta regenerar las salidas.")
+
+# ============================================================================================
+# MODO DEMONIO (v1.30)
+# ============================================================================================
+# Proceso persistente: las sesiones por gateway, la salud, la caché de ejecución y los CSV
+# de entrada se quedan en memoria, y cada fuente se refresca con su propia cadencia
+# (DAEMON_INTERVALS, en segundos). Con serve_port además se sirven las listas desde el mismo proceso.
+
+DAEMON_INTERVALS = {'agenda': 10 * 60, 'lists': 60 * 60}
+
+def run_daemon(intervals=None, max_cycles=None, serve_port=None, serve_host=None):
+    intervals = dict(DAEMON_INTERVALS, **(intervals or {}))
+    Path(config.DIR_CANALES).mkdir(exist_ok=True)
+    prepare_network(True, True)
+    if serve_port is not None:
+        from .server import serve_playlists
+        threading.Thread(target=serve_playlists, args=(serve_port, serve_host), daemon=True).start()
+    ctx = open_run_context()
+    next_due = {job: 0.0 for job in intervals}
+    print(f"[DAEMON] Agenda cada {intervals['agenda'] / 60:g} min, listas cada {intervals['lists'] / 60:g} min. Ctrl+C para salir.")
+    cycles = 0
+    try:
+        while max_cycles is None or cycles < max_cycles:
+            now = time.monotonic()
+            wait_s = min(next_due.values()) - now
+            if wait_s > 0:
+                time.sleep(wait_s)
+                continue
+            due = sorted(job for job, when in next_due.items() if when <= now)
+            for job in due: next_due[job] = now + intervals[job]
+            cycles += 1
+            reset_run_metrics()
+            print(f"\n[DAEMON] Ciclo {cycles} ({datetime.datetime.utcnow().strftime('%H:%M')} UTC): {', '.join(due)}")
+            try:
+                run_cycle(ctx, lists_due='lists' in due, agenda_due='agenda' in due)
+            except (Exception, SystemExit) as e:
+                # Un ciclo fallido no detiene el demonio: el siguiente vuelve a intentarlo
+                print(f"[DAEMON][ERROR] Ciclo {cycles} fallido: {e!r}")
+            write_run_report()
+    except KeyboardInterrupt:
+        print("\n[DAEMON] Detenido.")
+    finally:
+        close_run_context(ctx)
@@ -0,0 +1,112 @@
+# ============================================================================================
+# LOGICA DE LOG DE PROXIES
+# ============================================================================================
+
+import re
+import datetime
+import json
+from pathlib import Path
+
+from . import config
+from .util import AtomicOutput
+
+def _proxies_segment(day):
+    return Path(config.DIR_PROXIES_LOG, f"proxies-{day}.log")
+
+def proxies_log_segments():
+    """Segmentos existentes como [(día, ruta)] en orden cronológico."""
+    segments = []
+    for path in Path(config.DIR_PROXIES_LOG).glob("proxies-*.log"):
+        day = path.stem[len("proxies-"):]
+        if re.fullmatch(r'\d{4}-\d{2}-\d{2}', day): segments.append((day, path))
+    return sorted(segments)
+
+def iter_proxies_log(since=None):
+    """Líneas del log en orden cronológico; con since (AAAA-MM-DD) solo se abren los segmentos desde ese día."""
+    migrate_legacy_proxies_log()
+    for day, path in proxies_log_segments():
+        if since and day < since: continue
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+def load_proxies_summary():
+    path = Path(config.FILE_PROXIES_SUMMARY)
+    if path.exists():
+        try:
+            summary = json.loads(path.read_text(encoding='utf-8'))
+            if isinstance(summary, dict): return summary
+        except ValueError:
+            pass
+    return {'days': {}, 'last': {}}
+
+def save_proxies_summary(summary):
+    """[v2.0] Solo escribe si el contenido ha cambiado."""
+    Path(config.DIR_PROXIES_LOG).mkdir(parents=True, exist_ok=True)
+    with AtomicOutput(config.FILE_PROXIES_SUMMARY) as f:
+        f.write(json.dumps(summary, sort_keys=True, separators=(',', ':')))
+
+def _summarize_proxy_line(summary, line):
+    m = RE_PROXY_LOG_LINE.match(line)
+    if not m: return
+    ts_str, url, status, latency = m.groups()
+    per_url = summary['days'].setdefault(ts_str[:10], {}).setdefault(url, {})
+    per_url[status] = per_url.get(status, 0) + 1
+    summary['last'][url] = {'ts': ts_str, 'status': status, 'latency': float(latency) if latency else None,
+                            'selected': line.endswith("[SELECTED]")}
+
+def proxies_summary_totals(summary=None):
+    """Conteos por gateway y estado dentro de la retención: {url: {estado: n}}."""
+    summary = summary or load_proxies_summary()
+    totals = {}
+    for per_day in summary['days'].values():
+        for url, counts in per_day.items():
+            dest = totals.setdefault(url, {})
+            for status, n in counts.items(): dest[status] = dest.get(status, 0) + n
+    return totals
+
+def _append_proxies_lines(lines, summary):
+    """Anexa líneas (cronológicas) a su segmento diario y actualiza el resumen."""
+    Path(config.DIR_PROXIES_LOG).mkdir(parents=True, exist_ok=True)
+    by_day = {}
+    for line in lines:
+        m = RE_PROXY_LOG_LINE.match(line)
+        by_day.setdefault(m.group(1)[:10] if m else datetime.datetime.utcnow().strftime("%Y-%m-%d"), []).append(line)
+        _summarize_proxy_line(summary, line)
+    for day, day_lines in by_day.items():
+        with open(_proxies_segment(day), 'a', encoding='utf-8') as f:
+            f.write("".join(line + "\n" for line in day_lines))
+
+def _expire_proxies_segments(summary):
+    cutoff = (datetime.datetime.utcnow() - datetime.timedelta(days=config.PROXIES_RETENTION_DAYS)).strftime("%Y-%m-%d")
+    expired = 0
+    for day, path in proxies_log_segments():
+        if day >= cutoff: break
+        path.unlink()
+        expired += 1
+    for day in [d for d in summary['days'] if d < cutoff]:
+        del summary['days'][day]
+    return expired
+
+def migrate_legacy_proxies_log():
+    """Reparte el proxies.log antiguo (más reciente primero) en segmentos diarios y lo elimina."""
+    legacy = Path(config.FILE_PROXIES_LOG)
+    if not legacy.exists(): return
+    lines = [line for line in legacy.read_text(encoding='utf-8').splitlines() if line.strip()]
+    # Orden estable por fecha: cada ejecución conserva el orden de sus líneas
+    lines.sort(key=lambda line: line[1:17] if line.startswith("[") else "")
+    summary = load_proxies_summary()
+    _append_proxies_lines(lines, summary)
+    save_proxies_summary(summary)
+    legacy.unlink()
+    print(f"    [LOG] Migradas {len(lines)} líneas de {config.FILE_PROXIES_LOG} a {config.DIR_PROXIES_LOG}/.")
+
+def update_proxies_log(new_entries):
+    migrate_legacy_proxies_log()
+    summary = load_proxies_summary()
+    _append_proxies_lines(new_entries, summary)
+    expired = _expire_proxies_segments(summary)
+    save_proxies_summary(summary)
+    print(f"    [LOG] Proxies log actualizado ({len(new_entries)} nuevas, {len(summary['days'])} días, {expired} segmentos caducados).")
+
+RE_PROXY_LOG_LINE = re.compile(r'^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2})\] (\S+) \| ([A-Z]+)[^|]*(?:\| ([\d.]+)s)?')
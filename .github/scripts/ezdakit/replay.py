@@ -0,0 +1,117 @@
+# ============================================================================================
+# GRABACIÓN Y REPRODUCCIÓN DE GATEWAYS (v1.20)
+# ============================================================================================
+# Estructura de una instantánea:
+#   DIR/objects/ab/abcdef...   cuerpos, direccionados por su sha256
+#   DIR/index.json             {"urls": {url: [{sha, status, headers, latency, recorded}, ...]}}
+#   DIR/replay.json            (opcional) {"latency_scale": 1.0,
+#                                          "mirrors": {"ipfs.io": {"latency": 2.0, "timeout": true,
+#                                                                  "stale": true, "status": 503}}}
+# Cada URL guarda todas sus versiones grabadas; en reproducción se sirve la última
+# salvo que el mirror esté marcado "stale" (se sirve la más antigua).
+
+import time
+import datetime
+import json
+import hashlib
+import threading
+from pathlib import Path
+from urllib.parse import quote, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from . import config
+from .health import _gateway_key
+
+SNAPSHOT_HEADERS = ('ETag', 'Last-Modified', 'Content-Type')
+_SNAPSHOT_LOCK = threading.Lock()
+_REPLAY_SERVER = None
+
+def _snapshot_index_path(directory):
+    return Path(directory, "index.json")
+
+def load_snapshot_index(directory):
+    path = _snapshot_index_path(directory)
+    if not path.exists(): return {'urls': {}}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+def record_snapshot(url, status, headers, body, latency, error=None):
+    """Guarda una respuesta (o un error de red) en config.RECORD_DIR. No hace nada si no se está grabando."""
+    if not config.RECORD_DIR: return
+    entry = {'status': status, 'latency': round(latency, 3),
+             'recorded': datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}
+    if error:
+        entry['error'] = error
+    else:
+        sha = hashlib.sha256(body).hexdigest()
+        obj = Path(config.RECORD_DIR, "objects", sha[:2], sha)
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            obj.write_bytes(body)
+        entry['sha'] = sha
+        entry['headers'] = {k: headers[k] for k in SNAPSHOT_HEADERS if headers.get(k)}
+    with _SNAPSHOT_LOCK:
+        index = load_snapshot_index(config.RECORD_DIR)
+        index['urls'].setdefault(url, []).append(entry)
+        Path(config.RECORD_DIR).mkdir(parents=True, exist_ok=True)
+        _snapshot_index_path(config.RECORD_DIR).write_text(json.dumps(index, indent=2, sort_keys=True), encoding='utf-8')
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    """
+    Sustituto local de un gateway: la ruta es la URL original codificada.
+    Aplica la latencia grabada (o la configurada por mirror), respeta
+    If-None-Match / If-Modified-Since y puede simular caídas y contenido antiguo.
+    """
+    def do_GET(self):
+        url = unquote(self.path.lstrip('/'))
+        versions = self.server.index['urls'].get(url)
+        mirror = self.server.config.get('mirrors', {}).get(_gateway_key(url), {})
+        if not versions:
+            self.send_error(404, "Sin instantánea")
+            return
+        snap = versions[0] if mirror.get('stale') else versions[-1]
+        latency = mirror.get('latency', snap['latency'] * self.server.config.get('latency_scale', 1.0))
+
+        if mirror.get('timeout'):
+            time.sleep(mirror.get('timeout_s', config.TIMEOUT_READ + 1))
+            return  # el cliente ya habrá abandonado
+        time.sleep(latency)
+
+        status = mirror.get('status') or (504 if snap.get('error') else snap['status'])
+        if status != 200 or 'sha' not in snap:
+            self.send_error(status)
+            return
+        headers = snap.get('headers', {})
+        if (headers.get('ETag') and self.headers.get('If-None-Match') == headers['ETag']) or \
+           (headers.get('Last-Modified') and self.headers.get('If-Modified-Since') == headers['Last-Modified']):
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = Path(self.server.directory, "objects", snap['sha'][:2], snap['sha']).read_bytes()
+        self.send_response(200)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_replay_server(directory):
+    """Arranca el servidor de instantáneas en 127.0.0.1 (puerto libre) en un hilo en segundo plano."""
+    global _REPLAY_SERVER
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SnapshotHandler)
+    server.daemon_threads = True
+    server.directory = directory
+    server.index = load_snapshot_index(directory)
+    config_path = Path(directory, "replay.json")
+    server.config = json.loads(config_path.read_text(encoding='utf-8')) if config_path.exists() else {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _REPLAY_SERVER = server
+    print(f"    [REPLAY] {len(server.index['urls'])} URLs grabadas servidas desde http://127.0.0.1:{server.server_port}/")
+    return server
+
+def route_url(url):
+    """En modo --replay, redirige la petición al servidor local; si no, la URL no cambia."""
+    if _REPLAY_SERVER is None: return url
+    return f"http://127.0.0.1:{_REPLAY_SERVER.server_port}/{quote(url, safe='')}"
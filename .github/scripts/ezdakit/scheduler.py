@@ -0,0 +1,111 @@
+# ============================================================================================
+# PLANIFICADOR DE ETAPAS (v1.25)
+# ============================================================================================
+# run_cycle() (pipeline.py) declara las etapas y sus dependencias; cada etapa arranca en cuanto sus
+# dependencias han terminado. La salida de cada etapa se acumula y se imprime
+# entera al terminar, para que los bloques [n] no se mezclen.
+
+import sys
+import time
+import io
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .metrics import run_elapsed, stage_span
+
+Stage = namedtuple('Stage', ['name', 'fn', 'deps'])
+_PRINT_LOCK = threading.Lock()
+
+class _StageOutput(io.TextIOBase):
+    """sys.stdout por hilo: dentro de una etapa se escribe en su búfer; fuera, directo."""
+    def __init__(self, target):
+        self._target = target
+        self._local = threading.local()
+
+    def write(self, text):
+        buf = getattr(self._local, 'buf', None)
+        if buf is None:
+            with _PRINT_LOCK:
+                return self._target.write(text)
+        return buf.write(text)
+
+    def flush(self):
+        self._target.flush()
+
+def call_buffered(fn, *args):
+    """
+    Ejecuta fn en un hilo auxiliar de una etapa y devuelve (resultado, texto impreso),
+    para que quien lo lanzó lo imprima en orden. Fuera del planificador no captura nada.
+    """
+    out = sys.stdout
+    if not isinstance(out, _StageOutput): return fn(*args), ""
+    out._local.buf = io.StringIO()
+    try:
+        return fn(*args), out._local.buf.getvalue()
+    finally:
+        out._local.buf = None
+
+def _sched_log(message):
+    with _PRINT_LOCK:
+        sys.__stdout__.write(f"[SCHED] +{run_elapsed():6.2f}s {message}\n")
+
+def _run_stage(stage, results, timeline, output):
+    output._local.buf = io.StringIO()
+    start = time.monotonic()
+    _sched_log(f"inicio {stage.name}")
+    try:
+        with stage_span(stage.name):
+            return stage.fn(results)
+    finally:
+        end = time.monotonic()
+        timeline[stage.name] = (start, end)
+        text = output._local.buf.getvalue()
+        output._local.buf = None
+        with _PRINT_LOCK:
+            output._target.write(text)
+            output._target.flush()
+        _sched_log(f"fin    {stage.name} ({end - start:.2f}s)")
+
+def critical_path(stages, timeline):
+    """Cadena de dependencias que termina más tarde: la que marca la duración total."""
+    by_name = {st.name: st for st in stages}
+    current = max(timeline, key=lambda n: timeline[n][1])
+    path = [current]
+    while by_name[current].deps:
+        current = max(by_name[current].deps, key=lambda n: timeline[n][1])
+        path.append(current)
+    return path[::-1]
+
+def run_stage_graph(stages, sequential=False):
+    """
+    Ejecuta las etapas respetando sus dependencias, en paralelo salvo con sequential.
+    Devuelve {etapa: resultado}. Un fallo en una etapa se propaga al terminar las que estén en curso.
+    """
+    results, timeline = {}, {}
+    pending = {st.name: st for st in stages}
+    output = _StageOutput(sys.stdout)
+    previous_stdout, sys.stdout = sys.stdout, output
+    try:
+        with ThreadPoolExecutor(max_workers=1 if sequential else len(stages)) as executor:
+            running = {}
+            while pending or running:
+                for name, st in list(pending.items()):
+                    if all(d in results for d in st.deps):
+                        running[executor.submit(_run_stage, st, results, timeline, output)] = name
+                        del pending[name]
+                if not running:
+                    raise RuntimeError(f"Dependencias sin resolver: {', '.join(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results[running.pop(fut)] = fut.result()
+    finally:
+        sys.stdout = previous_stdout
+
+    path = critical_path(stages, timeline)
+    chain = " -> ".join(f"{n} ({timeline[n][1] - timeline[n][0]:.2f}s)" for n in path)
+    busy = sum(end - start for start, end in timeline.values())
+    span = max(end for _, end in timeline.values()) - min(start for start, _ in timeline.values())
+    print(f"    [SCHED] Ruta crítica: {chain}")
+    print(f"    [SCHED] {span:.2f}s de pared para {busy:.2f}s de etapas ({'en serie' if sequential else 'en paralelo'}).")
+    return results
@@ -0,0 +1,190 @@
+# ============================================================================================
+# SERVIDOR DE LISTAS (v1.29)
+# ============================================================================================
+# Con la suborden serve [--puerto N] [--host H] no se ejecuta el pipeline: sirve ezdakit.m3u y ezdakit_eventos.m3u
+# generadas al vuelo desde las copias locales (listas, agenda y CSV de entrada), con filtros
+# por query string. Las variantes renderizadas se guardan en memoria con su ETag y se
+# invalidan cuando cambia alguna entrada en disco (p.ej. tras la actualización horaria).
+#
+#   /ezdakit.m3u?grupo=LALIGA,DAZN&calidad=FHD&lista_negra=no&fuente=E
+#   /ezdakit_eventos.m3u?fecha=2026-08-22&competicion=masters&calidad=HD
+#
+# Por defecto solo escucha en 127.0.0.1; --host 0.0.0.0 la expone en todas las interfaces.
+
+import time
+import hashlib
+import gzip
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from . import config
+from .agenda import event_m3u_entry, iter_event_rows, scrape_and_match
+from .channels import build_master_channel_list, channel_group, channel_m3u_entry
+from .inputs import load_agenda_rules, load_blacklist, load_channel_maps
+from .metrics import count
+from .util import files_version
+
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8000
+SERVE_CACHE_SIZE = 64
+SERVE_GZIP_MIN = 1024
+
+def _field_filter(attr, transform=str.upper):
+    """Filtro por igualdad contra una lista de valores separados por comas."""
+    def build(value):
+        wanted = {transform(v.strip()) for v in value.split(",") if v.strip()}
+        return lambda row: transform(getattr(row, attr) if isinstance(attr, str) else attr(row)) in wanted
+    return build
+
+def _contains_filter(attr):
+    def build(value):
+        needles = [v.strip().upper() for v in value.split(",") if v.strip()]
+        return lambda row: any(n in getattr(row, attr).upper() for n in needles)
+    return build
+
+PLAYLIST_ENDPOINTS = {
+    # ruta: (conjunto de datos, render, filtros admitidos, filtros por defecto)
+    '/ezdakit.m3u': ('channels', channel_m3u_entry, {
+        'grupo': _field_filter(channel_group),
+        'calidad': _field_filter('calidad_clean'),
+        'lista_negra': _field_filter('in_blacklist', str.lower),
+        'fuente': _field_filter('source'),
+    }, {}),
+    '/ezdakit_eventos.m3u': ('events', event_m3u_entry, {
+        'fecha': _field_filter('fecha', str),
+        'competicion': _contains_filter('competicion'),
+        'calidad': _field_filter('calidad'),
+        'dial': _field_filter('dial_M', str),
+        'lista_negra': _field_filter('lista_negra', str.lower),
+    }, {'lista_negra': 'no'}),
+}
+
+def serving_inputs():
+    """Ficheros de los que dependen las listas servidas."""
+    return [src.file for src in config.CHANNEL_SOURCES] + [config.FILE_BLACKLIST, config.FILE_AUTO_BLACKLIST,
+                                                           config.FILE_FORZADOS, config.FILE_DIAL_MAP,
+                                                           config.FILE_REGLAS_AGENDA, config.FILE_AGENDA_CACHE]
+
+def _quiet(*args, **kwargs):
+    """Sustituto de print para las funciones de carga: el detalle del pipeline no interesa aquí."""
+
+def load_serving_data():
+    """
+    Lista maestra y filas de eventos a partir de las copias locales, sin acceso a red.
+    Solo lectura: no redirige sys.stdout (en daemon --servir comparte proceso con el
+    planificador) ni escribe la caché de días de la agenda.
+    """
+    blacklist = load_blacklist(log=_quiet)
+    dial_map, name_map = load_channel_maps(log=_quiet)
+    master_db = build_master_channel_list(blacklist, log=_quiet)
+    agenda_path = Path(config.FILE_AGENDA_CACHE)
+    html = agenda_path.read_bytes().decode('utf-8') if agenda_path.exists() else None
+    events_list, _ = scrape_and_match(dial_map, name_map, master_db, html, load_agenda_rules(log=_quiet),
+                                      log=_quiet, save_cache=False)
+    return {'channels': master_db, 'events': list(iter_event_rows(events_list))}
+
+class PlaylistCache:
+    """Datos cargados y variantes renderizadas: {(ruta, filtros): (etag, cuerpo, cuerpo_gzip)}."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.data = None
+        self.variants = OrderedDict()
+
+    def refresh(self):
+        """Recarga los datos si ha cambiado alguna entrada; devuelve True si se recargaron."""
+        version = files_version(serving_inputs())
+        if version == self.version: return False
+        start = time.monotonic()
+        data = load_serving_data()
+        self.data, self.version = data, version
+        self.variants.clear()
+        print(f"[SERVE] Datos recargados en {time.monotonic() - start:.2f}s: "
+                   f"{len(data['channels'])} canales, {len(data['events'])} filas de eventos.")
+        return True
+
+    def get(self, path, filters):
+        key = (path, tuple(sorted(filters.items())))
+        with self.lock:
+            self.refresh()
+            variant = self.variants.get(key)
+            if variant is not None:
+                self.variants.move_to_end(key)
+                count('serve_cache_hits')
+                return variant
+            dataset, render, builders, _ = PLAYLIST_ENDPOINTS[path]
+            rows = self.data[dataset]
+            for name, value in filters.items():
+                rows = filter(builders[name](value), rows)
+            body = (config.HEADER_M3U + "".join("\n" + render(row) for row in rows)).encode('utf-8')
+            # Un ETag fuerte por codificación: la copia gzip no es byte a byte la misma entidad
+            digest = hashlib.sha256(body).hexdigest()[:20]
+            variant = (f'"{digest}"', body, f'"{digest}-gz"',
+                       gzip.compress(body, mtime=0) if len(body) >= SERVE_GZIP_MIN else None)
+            self.variants[key] = variant
+            if len(self.variants) > SERVE_CACHE_SIZE: self.variants.popitem(last=False)
+            count('serve_renders')
+            return variant
+
+class PlaylistHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._respond(head=False)
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def _respond(self, head):
+        parsed = urlparse(self.path)
+        endpoint = PLAYLIST_ENDPOINTS.get(parsed.path)
+        if endpoint is None:
+            self.send_error(404, f"Rutas: {', '.join(PLAYLIST_ENDPOINTS)}")
+            return
+        filters = dict(endpoint[3])
+        for name, value in parse_qsl(parsed.query):
+            if name not in endpoint[2]:
+                self.send_error(400, f"Filtro no admitido: {name} (admitidos: {', '.join(endpoint[2])})")
+                return
+            filters[name] = value
+        if filters.get('lista_negra') in ('all', 'todos'): del filters['lista_negra']
+
+        etag, body, etag_gz, body_gz = self.server.cache.get(parsed.path, filters)
+        use_gzip = body_gz is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if use_gzip: etag, payload = etag_gz, body_gz
+        else: payload = body
+        if etag in [t.strip() for t in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/x-mpegurl; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip: self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if not head: self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_playlists(port=SERVE_PORT, host=None):
+    """Sirve las listas hasta Ctrl+C. La primera carga se hace antes de aceptar peticiones."""
+    host = host or SERVE_HOST
+    server = ThreadingHTTPServer((host, port), PlaylistHandler)
+    server.daemon_threads = True
+    server.cache = PlaylistCache()
+    server.cache.refresh()
+    print(f"[SERVE] Sirviendo en http://{host}:{server.server_port} ({', '.join(PLAYLIST_ENDPOINTS)}). Ctrl+C para salir.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return server
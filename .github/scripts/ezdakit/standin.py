@@ -0,0 +1,102 @@
+# ============================================================================================
+# MOTOR ACESTREAM DE PRUEBA (v2.1)
+# ============================================================================================
+# Sustituto local de la API HTTP del motor para probar el sondeo (liveness.py) sin motor real:
+#   /webui/api/service?method=get_version       versión (comprobación de disponibilidad)
+#   /ace/getstream?id=...&format=json           stat_url y command_url de la sesión
+#   /ace/stat/<id>                              estado según el modo del ace_id
+#   /ace/cmd/<id>?method=stop                   cierre de la sesión
+# Modo por ace_id (server.streams, modificable entre sondeos; si no está, server.default_mode):
+#   "peers"     descarga con peers tras server.warmup segundos
+#   "no_peers"  se queda en prebuf sin peers
+#   "timeout"   stat no responde hasta server.hang segundos después
+#   "error"     getstream devuelve error
+# server.requests cuenta las peticiones por ruta (getstream, stat, stop).
+
+import time
+import json
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class StandinEngineHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = dict(parse_qsl(parsed.query))
+        server = self.server
+        if parsed.path == '/webui/api/service' and params.get('method') == 'get_version':
+            self._json({'result': {'version': 'standin'}, 'error': None})
+            return
+        if parsed.path == '/ace/getstream':
+            ace_id = params.get('id', '')
+            server.count('getstream')
+            if server.mode(ace_id) == 'error':
+                self._json({'response': None, 'error': 'failed to load content'})
+                return
+            with server.lock:
+                server.started[ace_id] = time.monotonic()
+            base = f"http://127.0.0.1:{server.server_port}"
+            self._json({'response': {'stat_url': f"{base}/ace/stat/{ace_id}",
+                                     'command_url': f"{base}/ace/cmd/{ace_id}",
+                                     'playback_url': f"{base}/ace/r/{ace_id}"}, 'error': None})
+            return
+        if parsed.path.startswith('/ace/stat/'):
+            ace_id = parsed.path.rsplit('/', 1)[1]
+            server.count('stat')
+            mode = server.mode(ace_id)
+            if mode == 'timeout':
+                time.sleep(server.hang)
+                return  # el cliente ya habrá abandonado
+            with server.lock:
+                started = server.started.get(ace_id, time.monotonic())
+            peers = 3 if mode == 'peers' and time.monotonic() - started >= server.warmup else 0
+            self._json({'response': {'status': 'dl' if peers else 'prebuf', 'peers': peers}, 'error': None})
+            return
+        if parsed.path.startswith('/ace/cmd/'):
+            server.count('stop')
+            self._json({'response': 'ok', 'error': None})
+            return
+        self.send_error(404)
+
+    def _json(self, obj):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StandinEngine(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128   # Sondeos en paralelo: con la cola por defecto (5) se rechazan conexiones
+
+    def __init__(self, streams=None, default_mode='peers', warmup=0.2, hang=10):
+        super().__init__(('127.0.0.1', 0), StandinEngineHandler)
+        self.streams = dict(streams or {})
+        self.default_mode = default_mode
+        self.warmup = warmup
+        self.hang = hang
+        self.lock = threading.Lock()
+        self.started = {}
+        self.requests = Counter()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def mode(self, ace_id):
+        return self.streams.get(ace_id, self.default_mode)
+
+    def count(self, route):
+        with self.lock:
+            self.requests[route] += 1
+
+def start_standin_engine(streams=None, default_mode='peers', warmup=0.2, hang=10):
+    """Arranca el motor de prueba en 127.0.0.1 (puerto libre) en un hilo en segundo plano."""
+    server = StandinEngine(streams, default_mode, warmup, hang)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
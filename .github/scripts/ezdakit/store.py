@@ -0,0 +1,134 @@
+# ============================================================================================
+# ALMACÉN SQLITE (v1.22)
+# ============================================================================================
+# Con --sqlite, master_db y los cruces de agenda se sincronizan en .debug/store.sqlite.
+# Las filas que desaparecen no se borran: quedan inactivas con su última fecha de aparición,
+# y channel_changes guarda qué ace_id entró, salió o cambió en cada ejecución.
+
+import sqlite3
+from pathlib import Path
+
+from . import config
+from .agenda import Discard, EventMatch
+from .channels import Channel
+
+# [v1.23] Columnas en el mismo orden que los campos de Channel (sin grupo_orden), EventMatch y Discard
+CHANNEL_COLUMNS = Channel._fields[1:]
+EVENT_COLUMNS = EventMatch._fields
+EVENT_KEY = ('fecha', 'hora', 'evento', 'competicion', 'acestream_id', 'canal_agenda_real')
+DISCARD_COLUMNS = Discard._fields
+
+STORE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE IF NOT EXISTS channels (
+    {', '.join(f'{c} TEXT' for c in CHANNEL_COLUMNS)},
+    activo INTEGER NOT NULL DEFAULT 1, primera_vez TEXT, ultima_vez TEXT,
+    PRIMARY KEY (ace_id));
+CREATE INDEX IF NOT EXISTS idx_channels_tvg ON channels (final_tvg);
+CREATE TABLE IF NOT EXISTS channel_changes (ts TEXT, ace_id TEXT, cambio TEXT);
+CREATE INDEX IF NOT EXISTS idx_channel_changes_ace ON channel_changes (ace_id);
+CREATE TABLE IF NOT EXISTS events (
+    {', '.join(f'{c} TEXT' for c in EVENT_COLUMNS)},
+    dup INTEGER NOT NULL, orden INTEGER, activo INTEGER NOT NULL DEFAULT 1, primera_vez TEXT, ultima_vez TEXT,
+    PRIMARY KEY ({', '.join(EVENT_KEY)}, dup));
+CREATE INDEX IF NOT EXISTS idx_events_fecha ON events (fecha, hora);
+CREATE TABLE IF NOT EXISTS discards (orden INTEGER PRIMARY KEY, {', '.join(f'{c} TEXT' for c in DISCARD_COLUMNS)});
+"""
+
+def open_store(path=None):
+    path = path or config.FILE_STORE
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)   # [v1.25] Usado desde las etapas
+    conn.row_factory = sqlite3.Row
+    conn.executescript(STORE_SCHEMA)
+    return conn
+
+def store_meta(conn, key, value=None):
+    """Lee (value=None) o escribe un valor de la tabla meta."""
+    if value is None:
+        row = conn.execute("SELECT valor FROM meta WHERE clave = ?", (key,)).fetchone()
+        return row['valor'] if row else None
+    conn.execute("INSERT INTO meta (clave, valor) VALUES (?, ?) "
+                 "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor", (key, value))
+
+def _upsert_sql(table, columns, key):
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c not in key)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT({', '.join(key)}) DO UPDATE SET {updates}")
+
+def sync_channels(conn, master_db, ts):
+    """
+    Upsert de master_db. Solo se escriben las filas nuevas, modificadas o desaparecidas.
+    Devuelve (añadidos, eliminados, modificados).
+    """
+    current = {row['ace_id']: tuple(row[c] for c in CHANNEL_COLUMNS)
+               for row in conn.execute(f"SELECT {', '.join(CHANNEL_COLUMNS)} FROM channels WHERE activo = 1")}
+    incoming = {item.ace_id: item[1:] for item in master_db}
+    added = [aid for aid in incoming if aid not in current]
+    removed = [aid for aid in current if aid not in incoming]
+    changed = [aid for aid in incoming if aid in current and incoming[aid] != current[aid]]
+
+    columns = CHANNEL_COLUMNS + ('activo', 'ultima_vez')
+    with conn:
+        conn.executemany(_upsert_sql('channels', columns, ('ace_id',)),
+                         [incoming[aid] + (1, ts) for aid in added + changed])
+        conn.executemany("UPDATE channels SET primera_vez = ? WHERE ace_id = ? AND primera_vez IS NULL",
+                         [(ts, aid) for aid in added])
+        conn.executemany("UPDATE channels SET activo = 0 WHERE ace_id = ?", [(aid,) for aid in removed])
+        conn.executemany("INSERT INTO channel_changes (ts, ace_id, cambio) VALUES (?, ?, ?)",
+                         [(ts, aid, 'alta') for aid in added] + [(ts, aid, 'baja') for aid in removed] +
+                         [(ts, aid, 'cambio') for aid in changed])
+    return len(added), len(removed), len(changed)
+
+def query_channels(conn):
+    """Canales activos en el orden de build_master_channel_list."""
+    rows = conn.execute("SELECT CASE WHEN grupo_ne IS NULL OR grupo_ne = '' THEN 'ZZZ' ELSE grupo_ne END AS grupo_orden, "
+                        f"{', '.join(CHANNEL_COLUMNS)} FROM channels WHERE activo = 1 "
+                        "ORDER BY grupo_orden, nombre_supuesto, ace_id")
+    return [Channel._make(row) for row in rows]
+
+def sync_events(conn, event_rows, discarded_list, ts):
+    """
+    Upsert de los cruces de la agenda (clave natural + nº de repetición) y
+    sustitución de los descartes. Devuelve True si cambió alguna fila.
+    """
+    incoming, seen = {}, {}
+    for orden, ev in enumerate(event_rows):
+        key = tuple(getattr(ev, c) for c in EVENT_KEY)
+        dup = seen.get(key, 0)
+        seen[key] = dup + 1
+        incoming[key + (dup,)] = tuple(ev) + (dup, orden)
+    current = {tuple(row[c] for c in EVENT_KEY) + (row['dup'],): tuple(row[c] for c in EVENT_COLUMNS) + (row['dup'], row['orden'])
+               for row in conn.execute("SELECT * FROM events WHERE activo = 1")}
+    # Un cambio solo de 'orden' (filas desplazadas) no cuenta como modificación
+    upserts = [row for key, row in incoming.items() if current.get(key, ())[:-1] != row[:-1]]
+    reordered = [(row[-1],) + key for key, row in incoming.items() if key in current and current[key][-1] != row[-1]]
+    removed = [key for key in current if key not in incoming]
+    before = query_events(conn) if reordered else None
+
+    discards = [tuple(d) for d in discarded_list]
+    old_discards = [tuple(row[c] for c in DISCARD_COLUMNS)
+                    for row in conn.execute(f"SELECT {', '.join(DISCARD_COLUMNS)} FROM discards ORDER BY orden")]
+
+    columns = EVENT_COLUMNS + ('dup', 'orden', 'activo', 'ultima_vez')
+    with conn:
+        conn.executemany(_upsert_sql('events', columns, EVENT_KEY + ('dup',)), [row + (1, ts) for row in upserts])
+        conn.execute("UPDATE events SET primera_vez = ? WHERE primera_vez IS NULL", (ts,))
+        where_key = f"{' AND '.join(f'{c} = ?' for c in EVENT_KEY)} AND dup = ?"
+        conn.executemany(f"UPDATE events SET activo = 0 WHERE {where_key}", removed)
+        conn.executemany(f"UPDATE events SET orden = ? WHERE {where_key}", reordered)
+        if discards != old_discards:
+            conn.execute("DELETE FROM discards")
+            conn.executemany(f"INSERT INTO discards (orden, {', '.join(DISCARD_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                             [(i,) + d for i, d in enumerate(discards)])
+    print(f"    [SQLITE] Eventos: {len(upserts)} nuevos o modificados, {len(removed)} retirados.")
+    return bool(upserts or removed or discards != old_discards or (reordered and query_events(conn) != before))
+
+def query_events(conn):
+    """Cruces activos, en el orden de generate_eventos_files (índice por fecha/hora)."""
+    rows = conn.execute(f"SELECT {', '.join(EVENT_COLUMNS)} FROM events WHERE activo = 1 "
+                        "ORDER BY fecha, hora, competicion, evento, orden")
+    return [EventMatch._make(row) for row in rows]
+
+def query_discards(conn):
+    return [Discard._make(row) for row in conn.execute(f"SELECT {', '.join(DISCARD_COLUMNS)} FROM discards ORDER BY orden")]
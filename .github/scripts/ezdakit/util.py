@@ -0,0 +1,202 @@
+# ============================================================================================
+# UTILIDADES GENÉRICAS
+# ============================================================================================
+# Lectura tolerante de ficheros, salidas atómicas (v1.27) y normalización de nombres (v1.14).
+
+import os
+import re
+import io
+import tempfile
+import functools
+from pathlib import Path
+
+from .metrics import count
+
+# [v1.27] Búfer de escritura de las salidas
+OUTPUT_BUFFER = 1 << 16
+
+def read_file_safe(path_obj):
+    if not path_obj.exists(): return ""
+    raw = path_obj.read_bytes()
+    try:
+        content = raw.decode('utf-8')
+        if "Ã" in content: raise ValueError()
+        return content
+    except:
+        return raw.decode('latin-1', errors='ignore')
+
+class _ChangedOnlyWriter(io.RawIOBase):
+    """
+    [v1.27] Destino binario que compara lo escrito con el fichero existente según llega.
+    Mientras coincide no escribe nada; en la primera diferencia abre un temporal en la
+    misma carpeta, copia el prefijo común y sigue escribiendo en él.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self._old = open(self.path, 'rb') if self.path.exists() else None
+        self._pos = 0
+        self._tmp = None
+        if self._old is None: self._diverge()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        b = bytes(b)
+        if self._tmp is None:
+            if self._old.read(len(b)) == b:
+                self._pos += len(b)
+                return len(b)
+            self._diverge()
+        self._tmp.write(b)
+        return len(b)
+
+    def _diverge(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp = tempfile.NamedTemporaryFile('wb', dir=self.path.parent, prefix=f".{self.path.name}.",
+                                                suffix=".tmp", delete=False)
+        if self._old is not None:
+            self._old.seek(0)
+            remaining = self._pos
+            while remaining:
+                chunk = self._old.read(min(remaining, OUTPUT_BUFFER))
+                self._tmp.write(chunk)
+                remaining -= len(chunk)
+
+    def commit(self):
+        """Cierra la salida. Devuelve True si el fichero se ha sustituido."""
+        if self._tmp is None:
+            if self._old.read(1) == b"":
+                self._old.close()
+                return False
+            self._diverge()  # el fichero anterior era más largo
+        mode = os.stat(self.path).st_mode & 0o777 if self._old is not None else 0o644
+        if self._old is not None: self._old.close()
+        self._tmp.close()
+        os.chmod(self._tmp.name, mode)
+        os.replace(self._tmp.name, self.path)
+        return True
+
+    def discard(self):
+        if self._old is not None: self._old.close()
+        if self._tmp is not None:
+            self._tmp.close()
+            os.unlink(self._tmp.name)
+
+class AtomicOutput:
+    """
+    [v1.27] Salida de texto en streaming con sustitución atómica y sin escritura si el
+    contenido es idéntico. Tras el bloque 'with', .changed indica si el fichero cambió.
+
+        out = AtomicOutput(ruta, encoding='utf-8-sig', newline='')
+        with out as f:
+            csv.writer(f).writerow(...)
+    """
+    def __init__(self, path, encoding='utf-8', newline=None):
+        self.path = path
+        self.encoding = encoding
+        self.newline = newline
+        self.changed = False
+        self._cancelled = False
+
+    def __enter__(self):
+        self._raw = _ChangedOnlyWriter(self.path)
+        self._stream = io.TextIOWrapper(io.BufferedWriter(self._raw, buffer_size=OUTPUT_BUFFER),
+                                        encoding=self.encoding, newline=self.newline)
+        return self._stream
+
+    def cancel(self):
+        """Descarta lo escrito: el fichero existente (si lo hay) queda intacto."""
+        self._cancelled = True
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._stream.flush()
+        finally:
+            if exc_type or self._cancelled:
+                self._raw.discard()
+            else:
+                self.changed = self._raw.commit()
+                if not self.changed: count('outputs_unchanged')
+        return False
+
+def write_lines(f, header, entries):
+    """[v1.27] Escribe header + "\n" + "\n".join(entries) sin construir la cadena completa."""
+    f.write(header)
+    f.write("\n")
+    for i, entry in enumerate(entries):
+        if i: f.write("\n")
+        f.write(entry)
+
+# [v1.14] Términos técnicos a eliminar, compilados en una única alternancia.
+# La cola "-->..." se captura aparte y 1080 (sin 'p') solo cuenta para la calidad.
+NAME_TERMS = [
+    r'1080p', r'720p', r'FHD', r'UHD', r'4K', r'8K',
+    r'HD', r'SD',
+    r'50fps', r'HEVC', r'AAC', r'H\.265',
+    r'\(ES\)', r'\(SP\)', r'\(RU\)', r'\(M\d+\)', r'\(O\d+\)',
+    r'\(BACKUP\)', r'\|', r'vip', r'premium', r'\( original \)',
+    r'\bBAR\b'
+]
+RE_NAME_SCAN = re.compile(r'(?P<tail>-->.*)|(?P<term>' + '|'.join(NAME_TERMS) + r')|(?P<hint>1080)',
+                          re.IGNORECASE | re.DOTALL)
+RE_HEX_SUFFIX = re.compile(r'\s+[0-9a-fA-F]{4}$')
+QUALITY_TAGS = {2: " (UHD)", 1: " (FHD)", 0: " (HD)"}
+NAME_CACHE_SIZE = 8192
+
+def _quality_rank(text):
+    u = text.upper()
+    if "4K" in u or "UHD" in u: return 2
+    if "1080" in u or "FHD" in u: return 1
+    return 0
+
+@functools.lru_cache(maxsize=NAME_CACHE_SIZE)
+def scan_channel_name(name):
+    """
+    [v1.14] Una sola pasada sobre el nombre crudo: elimina los términos técnicos y
+    deduce el rango de calidad (2=UHD, 1=FHD, 0=HD) con lo que va encontrando.
+    Devuelve (nombre_base, rango). Memoizado por nombre crudo: se repiten entre ejecuciones y listas.
+    """
+    if not name: return "", 0
+    rank = 0
+
+    def scan(m):
+        nonlocal rank
+        text = m.group()
+        if rank < 2:
+            rank = max(rank, _quality_rank(text))
+        return text if m.lastgroup == 'hint' else ''
+
+    name = RE_NAME_SCAN.sub(scan, name)
+    return name.replace('  ', ' ').strip().rstrip(' -_'), rank
+
+def clean_channel_name(name, ace_id_suffix):
+    """
+    Limpieza básica del nombre del canal para generar el nombre_supuesto.
+    [v1.1] FUERZA MAYÚSCULAS AL FINAL.
+    """
+    name = scan_channel_name(name)[0]
+    if not name: return ""
+
+    if ace_id_suffix and name.endswith(ace_id_suffix):
+        name = name[:-4].strip()
+    name = RE_HEX_SUFFIX.sub('', name)
+
+    # CAMBIO v1.1: Devolver siempre mayúsculas
+    return name.upper()
+
+def determine_quality(*names):
+    """[v1.14] Calidad conjunta de varios nombres crudos (gana la mayor), reutilizando el memo."""
+    rank = max((scan_channel_name(n)[1] for n in names if n), default=0)
+    return QUALITY_TAGS[rank]
+
+def files_version(names):
+    """Firma barata (mtime, tamaño) de un conjunto de ficheros, para detectar cambios sin leerlos."""
+    version = []
+    for name in names:
+        try:
+            st = os.stat(name)
+            version.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            version.append((name, None, None))
+    return tuple(version)